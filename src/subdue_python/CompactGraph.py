@@ -0,0 +1,526 @@
+# CompactGraph.py
+#
+# Array-backed alternative to Graph for large input graphs.
+
+import json
+
+import numpy as np
+
+import subdue_python.Graph as Graph
+
+# The CompactGraph class stores the same attributed, mixed multi-graph as Graph, but in NumPy arrays indexed by
+# integer vertex and edge indices instead of one Python object per vertex and edge: label ids (see Graph.LabelId),
+# timestamps, edge end points, and the edges incident on each vertex in CSR form (incidentEdges[offsets[v]:offsets[v+1]],
+# in the same order as Vertex.edges, so self-loops appear twice). Each distinct attribute dictionary is stored once, in
+# the attribute table, and each vertex and edge has the index of its dictionary there as well as its label id. The two
+# differ, since equal dictionaries get the same label id even if their values differ in type, e.g. 1 and True.
+# Compress marks removed vertices and edges as dead and appends the new pattern vertices, so indices stay valid.
+#
+# The vertices and edges properties give dictionary-like views of CompactVertex and CompactEdge objects, which are
+# created on demand and offer the same fields as Vertex and Edge. The discovery loop, Compress, and output work
+# through these views, and to_graph converts to a Graph.
+class CompactGraph:
+
+    def __init__(self):
+        self.vertexIds = []
+        self.vertexLabelIds = np.zeros(0, dtype=np.int32)
+        self.vertexAttributeIds = np.zeros(0, dtype=np.int32)
+        self.vertexTimestamps = np.zeros(0, dtype=np.int64)
+        self.vertexTemporal = np.zeros(0, dtype=np.int32)
+        self.vertexAlive = np.zeros(0, dtype=bool)
+        self.edgeIds = []
+        self.edgeSources = np.zeros(0, dtype=np.int32)
+        self.edgeTargets = np.zeros(0, dtype=np.int32)
+        self.edgeDirected = np.zeros(0, dtype=bool)
+        self.edgeLabelIds = np.zeros(0, dtype=np.int32)
+        self.edgeAttributeIds = np.zeros(0, dtype=np.int32)
+        self.edgeTimestamps = np.zeros(0, dtype=np.int64)
+        self.edgeTemporal = np.zeros(0, dtype=np.int32)
+        self.edgeAlive = np.zeros(0, dtype=bool)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.incidentEdges = np.zeros(0, dtype=np.int32)
+        self.attributeTable = [] # attribute id -> attribute dictionary
+        self.attributeIds = {} # Graph.AttributesKey of attribute dictionary -> attribute id
+        self.attributeLabelIds = [] # attribute id -> label id
+        self.vertexIndex = None # vertex id -> index, built on first lookup by id
+        self.edgeIndex = None # edge id -> index, built on first lookup by id
+        self.numVertices = 0 # alive vertices
+        self.numEdges = 0 # alive edges
+        self.invariants = None
+        self.preservedCounts = None # see preserved_counts
+
+    @property
+    def vertices(self):
+        return CompactElements(self, CompactVertex)
+
+    @property
+    def edges(self):
+        return CompactElements(self, CompactEdge)
+
+    # Load graph from given JSON array of vertices and edges.
+    def load_from_json(self, jsonGraphArray):
+        vertexIndex = {}
+        vertexAttributeIds = []
+        vertexTimestamps = []
+        self.vertexIds = []
+        self.edgeIds = []
+        edgeSources = []
+        edgeTargets = []
+        edgeDirected = []
+        edgeAttributeIds = []
+        edgeTimestamps = []
+        self.attributeTable = []
+        self.attributeIds = {}
+        self.attributeLabelIds = []
+        for json_object in jsonGraphArray:
+            if ('vertex' in json_object):
+                vertexDict = json_object['vertex']
+                vertexId = vertexDict['id']
+                if (vertexId not in vertexIndex): # in case fused graph with duplicate vertices
+                    vertexIndex[vertexId] = len(self.vertexIds)
+                    self.vertexIds.append(vertexId)
+                    vertexTimestamps.append(int(vertexDict.get('timestamp', 0)))
+                    vertexAttributeIds.append(self.add_attributes(dict(vertexDict.get('attributes', {}))))
+            if ('edge' in json_object):
+                edgeDict = json_object['edge']
+                self.edgeIds.append(edgeDict['id'])
+                edgeSources.append(vertexIndex[edgeDict['source']])
+                edgeTargets.append(vertexIndex[edgeDict['target']])
+                edgeDirected.append(edgeDict['directed'] == 'true')
+                edgeTimestamps.append(int(edgeDict.get('timestamp', 0)))
+                edgeAttributeIds.append(self.add_attributes(dict(edgeDict.get('attributes', {}))))
+        self.vertexAttributeIds = np.array(vertexAttributeIds, dtype=np.int32)
+        self.vertexTimestamps = np.array(vertexTimestamps, dtype=np.int64)
+        self.vertexTemporal = np.zeros(len(self.vertexIds), dtype=np.int32)
+        self.vertexAlive = np.ones(len(self.vertexIds), dtype=bool)
+        self.edgeSources = np.array(edgeSources, dtype=np.int32)
+        self.edgeTargets = np.array(edgeTargets, dtype=np.int32)
+        self.edgeDirected = np.array(edgeDirected, dtype=bool)
+        self.edgeAttributeIds = np.array(edgeAttributeIds, dtype=np.int32)
+        self.edgeTimestamps = np.array(edgeTimestamps, dtype=np.int64)
+        self.edgeTemporal = np.zeros(len(self.edgeIds), dtype=np.int32)
+        self.edgeAlive = np.ones(len(self.edgeIds), dtype=bool)
+        self.vertexIndex = vertexIndex
+        self.edgeIndex = None
+        self.numVertices = len(self.vertexIds)
+        self.numEdges = len(self.edgeIds)
+        self.invariants = None
+        self.preservedCounts = None
+        self.set_label_ids()
+        self.build_adjacency()
+
+    def add_attributes(self, attributes):
+        """Returns the attribute id of the given attribute dictionary, adding it to the attribute table if new."""
+        key = Graph.AttributesKey(attributes)
+        attributeId = self.attributeIds.get(key)
+        if attributeId is None:
+            attributeId = self.attributeIds[key] = len(self.attributeTable)
+            self.attributeTable.append(attributes)
+            self.attributeLabelIds.append(Graph.LabelId(attributes))
+        return attributeId
+
+    def set_label_ids(self):
+        """Set the label ids of the vertices and edges from their attribute ids."""
+        attributeLabelIds = np.array(self.attributeLabelIds, dtype=np.int32)
+        self.vertexLabelIds = attributeLabelIds[self.vertexAttributeIds]
+        self.edgeLabelIds = attributeLabelIds[self.edgeAttributeIds]
+
+    def build_adjacency(self):
+        """Build the CSR arrays of incident edges from the edge end points. Each edge is incident on its source and
+        then its target, and the edges of a vertex are in index order, as add_edge would have added them."""
+        numEdges = len(self.edgeIds)
+        endpoints = np.empty(2 * numEdges, dtype=np.int32)
+        endpoints[0::2] = self.edgeSources
+        endpoints[1::2] = self.edgeTargets
+        order = np.argsort(endpoints, kind='stable')
+        self.incidentEdges = (order // 2).astype(np.int32)
+        counts = np.bincount(endpoints, minlength=len(self.vertexIds))
+        self.offsets = np.zeros(len(self.vertexIds) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+
+    def incident_edges(self, vertexIndex):
+        """Returns the indices of the edges incident on the given vertex, as a list."""
+        return self.incidentEdges[self.offsets[vertexIndex]:self.offsets[vertexIndex + 1]].tolist()
+
+    def vertex_index(self, vertexId):
+        if self.vertexIndex is None:
+            self.vertexIndex = {vertexId: index for index, vertexId in enumerate(self.vertexIds)}
+        return self.vertexIndex[vertexId]
+
+    def edge_index(self, edgeId):
+        if self.edgeIndex is None:
+            self.edgeIndex = {edgeId: index for index, edgeId in enumerate(self.edgeIds)}
+        return self.edgeIndex[edgeId]
+
+    def Compress(self, iteration, pattern):
+        """Compress graph using given pattern at given iteration, like Graph.Compress: replaces each instance of pattern
+           with a new vertex, and reconnects edges incident on the instance to the new vertex. Assumes no overlap among
+           instances. Returns the Graph.ChangeSet of the compression."""
+        self.invariants = None
+        self.preservedCounts = None
+        numOldVertices = len(self.vertexIds)
+        newIncidentEdges = []
+        newVertexAttributeId = self.add_attributes({'label': 'PATTERN-' + str(iteration)})
+        newTimestamps = []
+        changes = Graph.ChangeSet()
+        rewiredEdges = set()
+        instanceNum = 0
+        for instance in pattern.instances:
+            instanceNum += 1
+            newVertexIndex = numOldVertices + instanceNum - 1
+            self.vertexIds.append('PATTERN-' + str(iteration) + '-' + str(instanceNum))
+            newTimestamps.append(instance.max_timestamp())
+            changes.newVertices.append(self.vertexIds[-1])
+            # Remove instance's edges and vertices; remaining edges incident on them are made incident on the new vertex
+            for instanceEdge in instance.edges:
+                self.edgeAlive[instanceEdge.index] = False
+                changes.removedEdges.append(instanceEdge.id)
+            incidentEdges = []
+            newVertexEdges = set()
+            for instanceVertex in instance.vertices:
+                for edgeIndex in self.incident_edges(instanceVertex.index):
+                    if not self.edgeAlive[edgeIndex]:
+                        continue
+                    if self.edgeSources[edgeIndex] == instanceVertex.index:
+                        self.edgeSources[edgeIndex] = newVertexIndex
+                    if self.edgeTargets[edgeIndex] == instanceVertex.index:
+                        self.edgeTargets[edgeIndex] = newVertexIndex
+                    if edgeIndex not in newVertexEdges:
+                        newVertexEdges.add(edgeIndex)
+                        incidentEdges.append(edgeIndex)
+                    if edgeIndex not in rewiredEdges:
+                        rewiredEdges.add(edgeIndex)
+                        changes.rewiredEdges.append(self.edgeIds[edgeIndex])
+                self.vertexAlive[instanceVertex.index] = False
+                changes.removedVertices.append(instanceVertex.id)
+            newIncidentEdges.append(incidentEdges)
+        numNewVertices = len(newIncidentEdges)
+        self.vertexAttributeIds = np.concatenate((self.vertexAttributeIds,
+                                                  np.full(numNewVertices, newVertexAttributeId, dtype=np.int32)))
+        newVertexLabelId = self.attributeLabelIds[newVertexAttributeId]
+        self.vertexLabelIds = np.concatenate((self.vertexLabelIds, np.full(numNewVertices, newVertexLabelId, dtype=np.int32)))
+        self.vertexTimestamps = np.concatenate((self.vertexTimestamps, np.array(newTimestamps, dtype=np.int64)))
+        self.vertexTemporal = np.concatenate((self.vertexTemporal, np.zeros(numNewVertices, dtype=np.int32)))
+        self.vertexAlive = np.concatenate((self.vertexAlive, np.ones(numNewVertices, dtype=bool)))
+        # Alive old vertices keep their incident edges, dead ones lose all of theirs, new ones get the reconnected edges
+        owners = np.repeat(np.arange(numOldVertices), np.diff(self.offsets))
+        keptIncidentEdges = self.incidentEdges[self.vertexAlive[owners]]
+        counts = np.diff(self.offsets) * self.vertexAlive[:numOldVertices]
+        counts = np.concatenate((counts, [len(incidentEdges) for incidentEdges in newIncidentEdges])).astype(np.int64)
+        self.incidentEdges = np.concatenate([keptIncidentEdges] +
+                                            [np.array(incidentEdges, dtype=np.int32) for incidentEdges in newIncidentEdges])
+        self.offsets = np.zeros(len(self.vertexIds) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        if self.vertexIndex is not None:
+            for index in range(numOldVertices, len(self.vertexIds)):
+                self.vertexIndex[self.vertexIds[index]] = index
+        self.numVertices = int(np.count_nonzero(self.vertexAlive))
+        self.numEdges = int(np.count_nonzero(self.edgeAlive))
+        return changes
+
+    def preserved_counts(self):
+        """Returns the numbers of alive vertices and edges with a Preserve label, counted once per change."""
+        if self.preservedCounts is None:
+            preservedLabelIds = np.array(sorted(Graph.gPreservedLabelIds), dtype=np.int32)
+            self.preservedCounts = (int(np.count_nonzero(np.isin(self.vertexLabelIds[self.vertexAlive], preservedLabelIds))),
+                                    int(np.count_nonzero(np.isin(self.edgeLabelIds[self.edgeAlive], preservedLabelIds))))
+        return self.preservedCounts
+
+    def TemporalOrder(self):
+        """Set the temporal property of vertices and edges according to their order of arrival."""
+        self.invariants = None
+        timestamps = np.unique(np.concatenate((self.vertexTimestamps[self.vertexAlive], self.edgeTimestamps[self.edgeAlive])))
+        self.vertexTemporal = np.searchsorted(timestamps, self.vertexTimestamps).astype(np.int32)
+        self.edgeTemporal = np.searchsorted(timestamps, self.edgeTimestamps).astype(np.int32)
+
+    def to_graph(self):
+        """Returns a Graph with the same vertices and edges, built directly from the arrays."""
+        graph = Graph.Graph()
+        vertexObjects = {}
+        vertexTimestamps = self.vertexTimestamps.tolist()
+        vertexTemporal = self.vertexTemporal.tolist()
+        vertexLabelIds = self.vertexLabelIds.tolist()
+        vertexAttributeIds = self.vertexAttributeIds.tolist()
+        for index in np.flatnonzero(self.vertexAlive).tolist():
+            newVertex = Graph.Vertex(self.vertexIds[index])
+            newVertex.timestamp = vertexTimestamps[index]
+            newVertex.temporal = vertexTemporal[index]
+            newVertex.attributes = dict(self.attributeTable[vertexAttributeIds[index]])
+            newVertex.labelId = vertexLabelIds[index]
+            graph.vertices[newVertex.id] = newVertex
+            vertexObjects[index] = newVertex
+        edgeObjects = {}
+        edgeSources = self.edgeSources.tolist()
+        edgeTargets = self.edgeTargets.tolist()
+        edgeDirected = self.edgeDirected.tolist()
+        edgeTimestamps = self.edgeTimestamps.tolist()
+        edgeTemporal = self.edgeTemporal.tolist()
+        edgeLabelIds = self.edgeLabelIds.tolist()
+        edgeAttributeIds = self.edgeAttributeIds.tolist()
+        for index in np.flatnonzero(self.edgeAlive).tolist():
+            newEdge = Graph.Edge(self.edgeIds[index], vertexObjects[edgeSources[index]], vertexObjects[edgeTargets[index]],
+                                 edgeDirected[index])
+            newEdge.timestamp = edgeTimestamps[index]
+            newEdge.temporal = edgeTemporal[index]
+            newEdge.attributes = dict(self.attributeTable[edgeAttributeIds[index]])
+            newEdge.labelId = edgeLabelIds[index]
+            graph.edges[newEdge.id] = newEdge
+            edgeObjects[index] = newEdge
+        # Keep the order of each vertex's edges
+        offsets = self.offsets.tolist()
+        incidentEdges = self.incidentEdges.tolist()
+        for index, newVertex in vertexObjects.items():
+            newVertex.edges = [edgeObjects[edgeIndex] for edgeIndex in incidentEdges[offsets[index]:offsets[index + 1]]
+                               if edgeIndex in edgeObjects]
+        return graph
+
+    write_to_dot = Graph.Graph.write_to_dot
+    write_to_file = Graph.Graph.write_to_file
+    print_graph = Graph.Graph.print_graph
+
+
+class CompactElements:
+    """Dictionary-like view of the alive vertices (or edges) of a CompactGraph, keyed on id."""
+
+    def __init__(self, graph, elementClass):
+        self.graph = graph
+        self.elementClass = elementClass
+        if elementClass is CompactVertex:
+            self.ids = graph.vertexIds
+            self.alive = graph.vertexAlive
+            self.size = graph.numVertices
+            self.index = graph.vertex_index
+        else:
+            self.ids = graph.edgeIds
+            self.alive = graph.edgeAlive
+            self.size = graph.numEdges
+            self.index = graph.edge_index
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        ids = self.ids
+        return (ids[index] for index in np.flatnonzero(self.alive).tolist())
+
+    def __contains__(self, elementId):
+        try:
+            return bool(self.alive[self.index(elementId)])
+        except KeyError:
+            return False
+
+    def __getitem__(self, elementId):
+        index = self.index(elementId)
+        if not self.alive[index]:
+            raise KeyError(elementId)
+        return self.elementClass(self.graph, index)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        graph = self.graph
+        elementClass = self.elementClass
+        return (elementClass(graph, index) for index in np.flatnonzero(self.alive).tolist())
+
+    def items(self):
+        return ((element.id, element) for element in self.values())
+
+
+class CompactVertex:
+    """A vertex of a CompactGraph, with the fields of Vertex. Equal if it is the same vertex of the same graph."""
+
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    def __eq__(self, other):
+        return (type(other) is CompactVertex) and (other.index == self.index) and (other.graph is self.graph)
+
+    def __hash__(self):
+        return hash(self.index)
+
+    @property
+    def id(self):
+        return self.graph.vertexIds[self.index]
+
+    @property
+    def timestamp(self):
+        return int(self.graph.vertexTimestamps[self.index])
+
+    @property
+    def temporal(self):
+        return int(self.graph.vertexTemporal[self.index])
+
+    @property
+    def labelId(self):
+        return int(self.graph.vertexLabelIds[self.index])
+
+    @property
+    def attributes(self):
+        return self.graph.attributeTable[self.graph.vertexAttributeIds[self.index]]
+
+    @property
+    def edges(self):
+        graph = self.graph
+        return [CompactEdge(graph, edgeIndex) for edgeIndex in graph.incident_edges(self.index)]
+
+    print_vertex = Graph.Vertex.print_vertex
+    json_record = Graph.Vertex.json_record
+    write_to_file = Graph.Vertex.write_to_file
+
+
+class CompactEdge:
+    """An edge of a CompactGraph, with the fields of Edge. Equal if it is the same edge of the same graph."""
+
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    def __eq__(self, other):
+        return (type(other) is CompactEdge) and (other.index == self.index) and (other.graph is self.graph)
+
+    def __hash__(self):
+        return hash(self.index)
+
+    @property
+    def id(self):
+        return self.graph.edgeIds[self.index]
+
+    @property
+    def source(self):
+        return CompactVertex(self.graph, int(self.graph.edgeSources[self.index]))
+
+    @property
+    def target(self):
+        return CompactVertex(self.graph, int(self.graph.edgeTargets[self.index]))
+
+    @property
+    def directed(self):
+        return bool(self.graph.edgeDirected[self.index])
+
+    @property
+    def timestamp(self):
+        return int(self.graph.edgeTimestamps[self.index])
+
+    @property
+    def temporal(self):
+        return int(self.graph.edgeTemporal[self.index])
+
+    @property
+    def labelId(self):
+        return int(self.graph.edgeLabelIds[self.index])
+
+    @property
+    def attributes(self):
+        return self.graph.attributeTable[self.graph.edgeAttributeIds[self.index]]
+
+    print_edge = Graph.Edge.print_edge
+    json_record = Graph.Edge.json_record
+    write_to_file = Graph.Edge.write_to_file
+
+
+def CreateCompactGraphFromGraph(graph):
+    """Returns a CompactGraph with the same vertices and edges as the given Graph, in the same order."""
+    jsonGraphArray = []
+    for vertex in graph.vertices.values():
+        jsonGraphArray.append({'vertex': {'id': vertex.id, 'timestamp': vertex.timestamp, 'attributes': vertex.attributes}})
+    for edge in graph.edges.values():
+        jsonGraphArray.append({'edge': {'id': edge.id, 'source': edge.source.id, 'target': edge.target.id,
+                                        'directed': 'true' if edge.directed else 'false',
+                                        'timestamp': edge.timestamp, 'attributes': edge.attributes}})
+    compactGraph = CompactGraph()
+    compactGraph.load_from_json(jsonGraphArray)
+    # Keep the order of each vertex's edges, which is not index order in a compressed graph, and the temporal orders
+    edgeIndex = {edgeId: index for index, edgeId in enumerate(compactGraph.edgeIds)}
+    compactGraph.incidentEdges = np.array([edgeIndex[edge.id] for vertex in graph.vertices.values() for edge in vertex.edges],
+                                          dtype=np.int32)
+    np.cumsum(np.array([len(vertex.edges) for vertex in graph.vertices.values()], dtype=np.int64),
+              out=compactGraph.offsets[1:])
+    compactGraph.vertexTemporal = np.array([vertex.temporal for vertex in graph.vertices.values()], dtype=np.int32)
+    compactGraph.edgeTemporal = np.array([edge.temporal for edge in graph.edges.values()], dtype=np.int32)
+    compactGraph.edgeIndex = edgeIndex
+    return compactGraph
+
+
+# ----- Graph snapshots
+
+# A snapshot file holds the arrays of a CompactGraph, so that loading a graph does not parse JSON or create objects:
+# gSnapshotMagic, the length of a JSON header as 8 bytes, the header, and the arrays, 8-byte aligned as laid out by
+# ArrayLayout. The header holds the layout and the graph's attribute table. Label ids differ between processes, so
+# they are not stored, but set from the attribute table when the snapshot is read.
+gSnapshotMagic = b'SUBDUE-GRAPH-SNAPSHOT 2\n'
+gSnapshotExtension = '.snapshot'
+
+# Arrays of a CompactGraph, besides the vertex and edge ids
+gArrayNames = ["vertexLabelIds", "vertexAttributeIds", "vertexTimestamps", "vertexTemporal", "vertexAlive",
+               "edgeSources", "edgeTargets", "edgeDirected", "edgeLabelIds", "edgeAttributeIds", "edgeTimestamps",
+               "edgeTemporal", "edgeAlive", "offsets", "incidentEdges"]
+
+# Arrays of a CompactGraph in a snapshot
+gSnapshotArrayNames = [name for name in gArrayNames if name not in ["vertexLabelIds", "edgeLabelIds"]]
+
+def GraphArrays(compactGraph, arrayNames=gArrayNames):
+    """Returns the given arrays of the given CompactGraph by name, including its vertex and edge ids as fixed-width
+    string arrays."""
+    arrays = {name: getattr(compactGraph, name) for name in arrayNames}
+    arrays["vertexIds"] = np.array(compactGraph.vertexIds, dtype=str)
+    arrays["edgeIds"] = np.array(compactGraph.edgeIds, dtype=str)
+    return arrays
+
+def ArrayLayout(arrays):
+    """Returns the layout of the given arrays in one block of memory, as a list of (name, dtype, shape, offset) with
+    each array 8-byte aligned, and the size of the block."""
+    layout = []
+    size = 0
+    for name, array in arrays.items():
+        layout.append((name, array.dtype.str, array.shape, size))
+        size += (array.nbytes + 7) // 8 * 8
+    return layout, size
+
+def WriteSnapshot(graph, fileName):
+    """Write the given Graph or CompactGraph to the given snapshot file."""
+    if not isinstance(graph, CompactGraph):
+        graph = CreateCompactGraphFromGraph(graph)
+    arrays = GraphArrays(graph, gSnapshotArrayNames)
+    layout, size = ArrayLayout(arrays)
+    header = json.dumps({'layout': layout, 'attributes': graph.attributeTable}).encode()
+    dataOffset = (len(gSnapshotMagic) + 8 + len(header) + 7) // 8 * 8
+    with open(fileName, 'wb') as outputFile:
+        outputFile.write(gSnapshotMagic)
+        outputFile.write(len(header).to_bytes(8, 'little'))
+        outputFile.write(header)
+        for name, dtype, shape, offset in layout:
+            outputFile.seek(dataOffset + offset)
+            outputFile.write(np.ascontiguousarray(arrays[name]).tobytes())
+        outputFile.truncate(dataOffset + size)
+
+def ReadSnapshot(fileName, compact=True):
+    """Returns the graph in the given snapshot file, as a CompactGraph if compact is True and as a Graph otherwise.
+    The file is memory-mapped copy-on-write, so the arrays of the CompactGraph are read from it as they are used."""
+    buffer = np.memmap(fileName, dtype=np.uint8, mode='c')
+    if bytes(buffer[:len(gSnapshotMagic)]) != gSnapshotMagic:
+        raise ValueError(fileName + " is not a graph snapshot")
+    headerOffset = len(gSnapshotMagic) + 8
+    headerLength = int.from_bytes(bytes(buffer[len(gSnapshotMagic):headerOffset]), 'little')
+    header = json.loads(bytes(buffer[headerOffset:headerOffset + headerLength]))
+    dataOffset = (headerOffset + headerLength + 7) // 8 * 8
+    graph = CompactGraph()
+    for name, dtype, shape, offset in header['layout']:
+        setattr(graph, name, np.ndarray(tuple(shape), dtype=dtype, buffer=buffer, offset=dataOffset + offset))
+    graph.vertexIds = graph.vertexIds.tolist()
+    graph.edgeIds = graph.edgeIds.tolist()
+    # Label the attribute dictionaries in this process
+    for attributes in header['attributes']:
+        graph.add_attributes(attributes)
+    graph.set_label_ids()
+    graph.numVertices = int(np.count_nonzero(graph.vertexAlive))
+    graph.numEdges = int(np.count_nonzero(graph.edgeAlive))
+    if compact:
+        return graph
+    return graph.to_graph()
+
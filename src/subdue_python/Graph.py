@@ -5,6 +5,11 @@
 # Copyright (c) 2017-2021. Washington State University.
 
 import json
+import collections
+import functools
+import gzip
+import itertools
+import re
         
 # The Graph class allows the representation of an attributed, mixed multi-graph with time stamps on nodes
 # and edges. A graph has an id and a className (for now, either "positive" or "negative"). Each node has
@@ -16,10 +21,17 @@ class Graph:
     def __init__(self):
         self.vertices = {}
         self.edges = {}
+        self.invariants = None # cached GraphInvariants, see GetInvariants; reset whenever the graph changes
+        self.preservedCounts = None # cached numbers of Preserve-labeled vertices and edges, see preserved_counts
     
     def Compress(self,iteration,pattern):
         """Compress graph using given pattern at given iteration. Replaces each instance of pattern with a new
-           vertex, and reconnects edges incident on the instance to the new vertex. Assumes no overlap among instances."""
+           vertex, and reconnects edges incident on the instance to the new vertex. Assumes no overlap among instances.
+           Returns the ChangeSet of the compression. Takes time linear in the instances and the edges incident on them."""
+        self.invariants = None
+        self.preservedCounts = None
+        changes = ChangeSet()
+        rewiredEdges = set()
         instanceNum = 0
         for instance in pattern.instances:
             instanceNum += 1
@@ -30,24 +42,34 @@ class Graph:
             newVertex.timestamp = instance.max_timestamp()
             newVertex.add_attribute('label', newVertexLabel)
             self.vertices[newVertexId] = newVertex
-            # Remove instance's edges from graph and from source/target vertex edge lists
+            changes.newVertices.append(newVertexId)
+            # Remove instance's edges from graph; the end points of these edges are instance vertices, whose edge lists
+            # drop them below in one pass each
             for instanceEdge in instance.edges:
-                instanceEdge.source.edges.remove(instanceEdge)
-                instanceEdge.target.edges.remove(instanceEdge)
                 del self.edges[instanceEdge.id]
+                changes.removedEdges.append(instanceEdge.id)
             # Remove instance's vertices from graph; remaining edges incident on this vertex should be made incident on newVertex
+            newVertexEdges = set()
             for instanceVertex in instance.vertices:
+                instanceVertex.edges = [edge for edge in instanceVertex.edges if edge not in instance.edges]
                 for edge in instanceVertex.edges:
                     if edge.source == instanceVertex:
                         edge.source = newVertex
                     if edge.target == instanceVertex:
                         edge.target = newVertex
-                    if edge not in newVertex.edges:
+                    if edge not in newVertexEdges:
+                        newVertexEdges.add(edge)
                         newVertex.edges.append(edge)
+                    if edge not in rewiredEdges:
+                        rewiredEdges.add(edge)
+                        changes.rewiredEdges.append(edge.id)
                 del self.vertices[instanceVertex.id]
+                changes.removedVertices.append(instanceVertex.id)
+        return changes
 
     def TemporalOrder(self):
         """Set the temporal property of vertices and edges according to their order of arrival."""
+        self.invariants = None
         # Collect and sort all unique timestamps in graph
         timestamps = []
         for vertex in self.vertices.values():
@@ -63,12 +85,21 @@ class Graph:
         for edge in self.edges.values():
             edge.temporal = timestamps.index(edge.timestamp)
 
-    # Load graph from given JSON array of vertices and edges.
-    # ***** todo: Read graph from stream, rather than all at once
+    def preserved_counts(self):
+        """Returns the numbers of vertices and edges with a Preserve label (see Preserved), counted once per change."""
+        if self.preservedCounts is None:
+            self.preservedCounts = (sum(Preserved(vertex) for vertex in self.vertices.values()),
+                                    sum(Preserved(edge) for edge in self.edges.values()))
+        return self.preservedCounts
+
+    # Load graph from given JSON array of vertices and edges, or from any iterable of its objects, such as
+    # ReadJsonGraph(fileName), which reads them from a file one at a time.
     def load_from_json (self, jsonGraphArray):
         # Initialize graph (just in case it's being reused)
         self.vertices = {}
         self.edges = {}
+        self.invariants = None
+        self.preservedCounts = None
         for json_object in jsonGraphArray:
             if ('vertex' in json_object):
                 vertexDict = json_object['vertex']
@@ -81,6 +112,7 @@ class Graph:
                         json_attrs = vertexDict['attributes']
                         for key,value in json_attrs.items():
                             vertex.add_attribute(key, value)
+                    InternLabel(vertex)
                     self.vertices[vertexId] = vertex
             if ('edge' in json_object):
                 edgeDict = json_object['edge']
@@ -99,6 +131,7 @@ class Graph:
                     json_attrs = edgeDict['attributes']
                     for key,value in json_attrs.items():
                         edge.add_attribute(key,value)
+                InternLabel(edge)
                 self.edges[edgeId] = edge
                 sourceVertex.add_edge(edge)
                 targetVertex.add_edge(edge)
@@ -159,28 +192,10 @@ class Graph:
         outputFile.write('}\n')
         outputFile.close()
     
-    def write_to_file(self, outputFileName):
-        """Write graph to given file name in JSON format."""
-        outputFile = open(outputFileName, 'w')
-        outputFile.write('[\n')
-        firstOne = True
-        for vertex in self.vertices.values():
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',\n')
-            vertex.write_to_file(outputFile)
-        outputFile.write(',\n')
-        firstOne = True
-        for edge in self.edges.values():
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',\n')
-            edge.write_to_file(outputFile)
-        outputFile.write('\n]\n')
-        outputFile.close()
-    
+    def write_to_file(self, outputFileName, jsonLines=False):
+        """Write graph to given file name in JSON format, or JSON Lines if jsonLines is True (see WriteJsonGraph)."""
+        WriteJsonGraph(outputFileName, itertools.chain(self.vertices.values(), self.edges.values()), jsonLines)
+
     def print_graph(self, tab=""):
         print(tab + "Graph:")
         for vertex in self.vertices.values():
@@ -196,9 +211,23 @@ class Vertex:
         self.temporal = 0 # used to set arrival order of vertex internally for graph matcher
         self.attributes = {}
         self.edges = []
-    
+
+    @property
+    def attributes(self):
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, attributes):
+        SetAttributes(self, attributes)
+
+    @functools.cached_property
+    def labelId(self):
+        """Label id of attributes, compared by graph matcher instead of attributes; see LabelId."""
+        return LabelId(self._attributes)
+
     def add_attribute(self, key, value):
-        self.attributes[key] = value
+        self._attributes[key] = value
+        self.__dict__.pop('labelId', None)
     
     def add_edge(self, edge):
         self.edges.append(edge)
@@ -209,20 +238,14 @@ class Vertex:
             attributeString += ', ' + key + '=' + str(value)
         print(tab + 'vertex "' + self.id + '": timestamp=' + str(self.timestamp) + attributeString)
     
+    def json_record(self, attributeCodes):
+        """Returns the vertex as an object of the JSON graph format, in one line of JSON text (see JsonAttributes)."""
+        return ('{"vertex": {"id": ' + JsonString(self.id) + ', "attributes": ' + JsonAttributes(self, attributeCodes) +
+                ', "timestamp": "' + str(self.timestamp) + '"}}')
+
     def write_to_file(self, outputFile):
         """Write vertex to given file stream in JSON format"""
-        outputFile.write('  {"vertex": {\n')
-        outputFile.write('     "id": "' + self.id + '",\n')
-        outputFile.write('     "attributes": {')
-        firstOne = True
-        for key,value in self.attributes.items():
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',')
-            outputFile.write('"' + key + '": "' + value + '"')
-        outputFile.write('},\n')
-        outputFile.write('     "timestamp": "' + str(self.timestamp) + '"}}')
+        outputFile.write('  ' + self.json_record({}))
 
 class Edge:
 
@@ -234,9 +257,23 @@ class Edge:
         self.timestamp = 0
         self.temporal = 0 # used to set arrival order of edge internally for graph matcher
         self.attributes = {}
-        
+
+    @property
+    def attributes(self):
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, attributes):
+        SetAttributes(self, attributes)
+
+    @functools.cached_property
+    def labelId(self):
+        """Label id of attributes, compared by graph matcher instead of attributes; see LabelId."""
+        return LabelId(self._attributes)
+
     def add_attribute(self, key, value):
-        self.attributes[key] = value
+        self._attributes[key] = value
+        self.__dict__.pop('labelId', None)
     
     def print_edge(self, tab=""):
         attributeString = ""
@@ -250,26 +287,27 @@ class Edge:
         edgeString += self.target.id
         print(tab + 'edge "' + self.id + '" (' + edgeString + '): timestamp=' + str(self.timestamp) + attributeString)
         
+    def json_record(self, attributeCodes):
+        """Returns the edge as an object of the JSON graph format, in one line of JSON text (see JsonAttributes)."""
+        return ('{"edge": {"id": ' + JsonString(self.id) + ', "source": ' + JsonString(self.source.id) +
+                ', "target": ' + JsonString(self.target.id) + ', "attributes": ' + JsonAttributes(self, attributeCodes) +
+                ', "directed": "' + ('true' if self.directed else 'false') + '", "timestamp": "' + str(self.timestamp) + '"}}')
+
     def write_to_file(self, outputFile):
         """Write edge to given file stream in JSON format"""
-        outputFile.write('  {"edge": {\n')
-        outputFile.write('     "id": "' + self.id + '",\n')
-        outputFile.write('     "source": "' + self.source.id + '",\n')
-        outputFile.write('     "target": "' + self.target.id + '",\n')
-        outputFile.write('     "attributes": {')
-        firstOne = True
-        for key,value in self.attributes.items():
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',')
-            outputFile.write('"' + key + '": "' + value + '"')
-        outputFile.write('},\n')
-        if self.directed:
-            outputFile.write('     "directed": "true",\n')
-        else:
-            outputFile.write('     "directed": "false",\n')
-        outputFile.write('     "timestamp": "' + str(self.timestamp) + '"}}')
+        outputFile.write('  ' + self.json_record({}))
+
+
+# A ChangeSet records, by id, what Compress changed in a graph: the vertices and edges of the instances it removed,
+# the new vertices that replace the instances, and the remaining edges it reconnected to the new vertices, each in the
+# order Compress visited them. The end points of the rewired edges are the vertices whose neighborhoods changed.
+class ChangeSet:
+
+    def __init__(self):
+        self.removedVertices = []
+        self.removedEdges = []
+        self.newVertices = []
+        self.rewiredEdges = []
 
 
 # ----- Graph matcher
@@ -277,21 +315,57 @@ class Edge:
 # New in version 1.2: poly-time-bounded graph matcher
 
 gMaxMappings = 1 # Will be set to E^2 for each match
+gIsomorphism = "bounded" # Set by SetMatcher: "bounded" (at most E^2 mappings), "exact", or "adaptive"
+
+# Counts of graph matches: "calls" to GraphMatch/GraphMatch_Orig/GraphMatch_VF2, of which "avoided" were rejected on the
+# cached graph invariants and "searched" needed a call to ExtendMapping. Of those, "boundHits" gave up after
+# gMaxMappings mappings, and "escalatedMatches" were then found to match by the exact search in adaptive mode.
+# Of the calls to Match that passed the invariants, "cacheHits" were answered from gMatchCache, without a call.
+gMatchStatistics = {"calls": 0, "avoided": 0, "searched": 0, "boundHits": 0, "escalatedMatches": 0,
+                    "cacheHits": 0, "cacheMisses": 0}
+
+def ResetMatchStatistics():
+    """Set all graph match counts to zero."""
+    for key in gMatchStatistics:
+        gMatchStatistics[key] = 0
+
+def MatchStatisticsString():
+    """Returns a one-line summary of the graph match counts."""
+    calls = gMatchStatistics["calls"]
+    avoided = gMatchStatistics["avoided"]
+    percentage = 0.0
+    if calls > 0:
+        percentage = 100.0 * avoided / calls
+    return ("Graph matches: " + str(calls) + " calls, " + str(avoided) + " avoided by invariants (" +
+            "%.1f" % percentage + "%), " + str(gMatchStatistics["searched"]) + " searched, " +
+            str(gMatchStatistics["boundHits"]) + " hit the mapping bound, " +
+            str(gMatchStatistics["escalatedMatches"]) + " matched after escalation, " +
+            str(gMatchStatistics["cacheHits"]) + " cache hits, " + str(gMatchStatistics["cacheMisses"]) + " cache misses")
 
 def GraphMatch(graph1, graph2):
     """Returns True if given graphs are isomorphic.
-    This is a poly-time, approximate version of graph isomorphism."""
+    This is a poly-time, approximate version of graph isomorphism, unless gIsomorphism asks for an exact search
+    always ("exact") or whenever the bounded search gives up ("adaptive")."""
     global gMaxMappings
-    if (len(graph1.vertices) != len(graph2.vertices)):
-        return False
-    if (len(graph1.edges) != len(graph2.edges)):
+    gMatchStatistics["calls"] += 1
+    if InvariantsDiffer(graph1, graph2):
+        gMatchStatistics["avoided"] += 1
         return False
     if (len(graph1.edges) == 0):
         v1keys = list(graph1.vertices.keys())
         v2keys = list(graph2.vertices.keys())
         return MatchVertex(graph1, graph2, v1keys[0], v2keys[0])
+    gMatchStatistics["searched"] += 1
+    if gIsomorphism == "exact":
+        return ExtendMapping_Orig(graph1, graph2)
     gMaxMappings = len(graph1.edges) ** 2 # Limit search to E^2 mappings
     matchFound, numMappings = ExtendMapping(graph1, graph2)
+    if (not matchFound) and (numMappings > gMaxMappings):
+        gMatchStatistics["boundHits"] += 1
+        if gIsomorphism == "adaptive":
+            matchFound = ExtendMapping_Orig(graph1, graph2)
+            if matchFound:
+                gMatchStatistics["escalatedMatches"] += 1
     return matchFound
 
 def ExtendMapping(graph1, graph2, mapping=None, numMappings=0):
@@ -326,14 +400,15 @@ def ExtendMapping(graph1, graph2, mapping=None, numMappings=0):
 def GraphMatch_Orig(graph1, graph2):
     """Returns True if given graphs are isomorphic.
     This is a correct, non-approximate version of graph isomorphism."""
-    if (len(graph1.vertices) != len(graph2.vertices)):
-        return False
-    if (len(graph1.edges) != len(graph2.edges)):
+    gMatchStatistics["calls"] += 1
+    if InvariantsDiffer(graph1, graph2):
+        gMatchStatistics["avoided"] += 1
         return False
     if (len(graph1.edges) == 0):
         v1keys = list(graph1.vertices.keys())
         v2keys = list(graph2.vertices.keys())
         return MatchVertex(graph1, graph2, v1keys[0], v2keys[0])
+    gMatchStatistics["searched"] += 1
     return ExtendMapping_Orig(graph1, graph2)
 
 def ExtendMapping_Orig(graph1, graph2, mapping=None):
@@ -365,7 +440,7 @@ def MatchEdge(graph1, graph2, edgeId1, edgeId2, mapping):
     i.e., have same attributes, direction, temporal ordering, and source/target vertices."""
     edge1 = graph1.edges[edgeId1]
     edge2 = graph2.edges[edgeId2]
-    if not (edge1.attributes == edge2.attributes):
+    if (edge1.labelId != edge2.labelId):
         return False
     if (edge1.directed != edge2.directed):
         return False
@@ -386,7 +461,7 @@ def MatchVertex(graph1, graph2, vertexId1, vertexId2):
     # First check for same attributes
     vertex1 = graph1.vertices[vertexId1]
     vertex2 = graph2.vertices[vertexId2]
-    if not (vertex1.attributes == vertex2.attributes):
+    if (vertex1.labelId != vertex2.labelId):
         return False
     if (len(vertex1.edges) != len(vertex2.edges)):
         return False
@@ -396,6 +471,340 @@ def MatchVertex(graph1, graph2, vertexId1, vertexId2):
     return True
 
 
+# ----- Exact graph matcher
+
+def GraphMatch_VF2(graph1, graph2):
+    """Returns True if given graphs are isomorphic.
+    This is an exact, VF2++-style version of graph isomorphism. Unlike ExtendMapping, it keeps the vertex mapping
+    consistent in both directions, maps the most constrained edges of graph1 first, and only tries the edges of
+    graph2 with the same edge signature as candidates. As for GraphMatch, gIsomorphism bounds the search to E^2
+    mappings ("bounded"), or not ("exact"), or retries without the bound when it is hit ("adaptive")."""
+    gMatchStatistics["calls"] += 1
+    if InvariantsDiffer(graph1, graph2):
+        gMatchStatistics["avoided"] += 1
+        return False
+    if (len(graph1.edges) == 0):
+        v1keys = list(graph1.vertices.keys())
+        v2keys = list(graph2.vertices.keys())
+        return MatchVertex(graph1, graph2, v1keys[0], v2keys[0])
+    gMatchStatistics["searched"] += 1
+    invariants1 = GetInvariants(graph1)
+    invariants2 = GetInvariants(graph2)
+    if invariants1.isolatedVertices != invariants2.isolatedVertices:
+        return False
+    order = GetMatchIndex(graph1).order
+    candidates = GetMatchIndex(graph2).candidates
+    if gIsomorphism == "exact":
+        matchFound, numMappings = ExtendMapping_VF2(order, invariants1, invariants2, candidates)
+        return matchFound
+    maxMappings = len(graph1.edges) ** 2
+    matchFound, numMappings = ExtendMapping_VF2(order, invariants1, invariants2, candidates, maxMappings)
+    if (not matchFound) and (numMappings > maxMappings):
+        gMatchStatistics["boundHits"] += 1
+        if gIsomorphism == "adaptive":
+            matchFound, numMappings = ExtendMapping_VF2(order, invariants1, invariants2, candidates)
+            if matchFound:
+                gMatchStatistics["escalatedMatches"] += 1
+    return matchFound
+
+def ExtendMapping_VF2(order, invariants1, invariants2, candidates, maxMappings=None):
+    """Map the edges of graph1, in the given order, onto candidate edges of graph2 with the same signature, such
+    that the implied vertex mapping stays one-to-one. Give up after maxMappings mappings, unless None. Return the
+    match result and number of mappings tried."""
+    vertexMapping = {}
+    reverseVertexMapping = {}
+    mappedEdgeIds = set()
+    numMappings = 0
+
+    def MapVertex(vertex1, vertex2, newVertexIds):
+        mappedId = vertexMapping.get(vertex1.id)
+        if mappedId is not None:
+            return mappedId == vertex2.id
+        if vertex2.id in reverseVertexMapping:
+            return False
+        if (invariants1.vertexKeys[vertex1.id] != invariants2.vertexKeys[vertex2.id]):
+            return False
+        vertexMapping[vertex1.id] = vertex2.id
+        reverseVertexMapping[vertex2.id] = vertex1.id
+        newVertexIds.append(vertex1.id)
+        return True
+
+    def Extend(index):
+        nonlocal numMappings
+        if index == len(order):
+            return True
+        if (maxMappings is not None) and (numMappings > maxMappings):
+            return False
+        edge1 = order[index]
+        for edge2 in candidates.get(invariants1.edgeSignatures[edge1.id], ()):
+            if (edge2.id in mappedEdgeIds):
+                continue
+            endpoints = [(edge2.source, edge2.target)]
+            if (not edge1.directed) and (edge2.source is not edge2.target):
+                endpoints.append((edge2.target, edge2.source))
+            for source2, target2 in endpoints:
+                newVertexIds = []
+                if MapVertex(edge1.source, source2, newVertexIds) and MapVertex(edge1.target, target2, newVertexIds):
+                    mappedEdgeIds.add(edge2.id)
+                    numMappings += 1
+                    if Extend(index + 1):
+                        return True
+                    mappedEdgeIds.discard(edge2.id)
+                for vertexId in newVertexIds:
+                    del reverseVertexMapping[vertexMapping.pop(vertexId)]
+        return False
+
+    return Extend(0), numMappings
+
+class MatchIndex:
+    """Search order and candidate lists of a graph for GraphMatch_VF2."""
+
+    def __init__(self, graph):
+        invariants = GetInvariants(graph)
+        # Candidate edges of this graph, as graph2, grouped by edge signature
+        self.candidates = {}
+        for edge in graph.edges.values():
+            self.candidates.setdefault(invariants.edgeSignatures[edge.id], []).append(edge)
+        # Order in which the edges of this graph, as graph1, are mapped. Graphs that pass InvariantsDiffer have the
+        # same number of edges per signature, so the rarity of a label can be taken from this graph alone.
+        self.order = []
+        orderedVertices = set()
+        remaining = list(graph.edges.values())
+        while remaining:
+            bestEdge = min(remaining, key=lambda edge: (
+                -((edge.source.id in orderedVertices) + (edge.target.id in orderedVertices)), # connected edges first
+                len(self.candidates[invariants.edgeSignatures[edge.id]]),                     # then rarest signature
+                -(len(edge.source.edges) + len(edge.target.edges))))                            # then highest degree
+            remaining.remove(bestEdge)
+            self.order.append(bestEdge)
+            orderedVertices.add(bestEdge.source.id)
+            orderedVertices.add(bestEdge.target.id)
+
+def GetMatchIndex(graph):
+    """Returns the MatchIndex of the given graph, computing and caching it along with the graph's invariants."""
+    invariants = GetInvariants(graph)
+    if invariants.matchIndex is None:
+        invariants.matchIndex = MatchIndex(graph)
+    return invariants.matchIndex
+
+
+# ----- Matcher selection
+
+gMatchers = {"subdue": GraphMatch, "vf2": GraphMatch_VF2}
+gMatcher = GraphMatch # Set by SetMatcher
+
+# Least recently used cache of the verdicts of Match, keyed on the fingerprints of both graphs (see Fingerprint), with
+# at most gMatchCacheSize entries; 0 turns caching off. Emptied by SetMatcher, as verdicts depend on the matcher.
+gMatchCache = collections.OrderedDict()
+gMatchCacheSize = 10000
+
+def SetMatcher(matcher, isomorphism="bounded", cacheSize=10000):
+    """Select the graph matcher used by Match: "subdue" (GraphMatch) or "vf2" (GraphMatch_VF2), whether it
+    searches "bounded", "exact", or "adaptive", and how many verdicts Match caches."""
+    global gMatcher, gIsomorphism, gMatchCacheSize
+    gMatcher = gMatchers[matcher]
+    gIsomorphism = isomorphism
+    gMatchCacheSize = cacheSize
+    gMatchCache.clear()
+
+def Match(graph1, graph2):
+    """Returns True if given graphs match according to the matcher selected with SetMatcher. Graphs that pass the
+    invariants are looked up in gMatchCache first."""
+    if (gMatchCacheSize == 0) or InvariantsDiffer(graph1, graph2):
+        return gMatcher(graph1, graph2)
+    key = (Fingerprint(graph1), Fingerprint(graph2))
+    matchFound = gMatchCache.get(key)
+    if matchFound is not None:
+        gMatchStatistics["cacheHits"] += 1
+        gMatchCache.move_to_end(key)
+        return matchFound
+    gMatchStatistics["cacheMisses"] += 1
+    matchFound = gMatcher(graph1, graph2)
+    gMatchCache[key] = matchFound
+    if len(gMatchCache) > gMatchCacheSize:
+        gMatchCache.popitem(last=False)
+    return matchFound
+
+def Fingerprint(graph):
+    """Returns a hashable fingerprint of the given graph, cached with its invariants: its vertices and edges in order,
+    with label ids, temporal orders, and positions of end points and incident edges instead of ids. The matchers only
+    look at these, so they give the same verdict for any two pairs of graphs with the same fingerprints."""
+    invariants = GetInvariants(graph)
+    if invariants.fingerprint is None:
+        vertexPositions = {vertexId: position for position, vertexId in enumerate(graph.vertices)}
+        edgePositions = {edgeId: position for position, edgeId in enumerate(graph.edges)}
+        vertices = tuple((vertex.labelId, vertex.temporal, tuple(edgePositions[edge.id] for edge in vertex.edges))
+                         for vertex in graph.vertices.values())
+        edges = tuple((edge.labelId, edge.directed, edge.temporal, vertexPositions[edge.source.id],
+                       vertexPositions[edge.target.id]) for edge in graph.edges.values())
+        invariants.fingerprint = (vertices, edges)
+    return invariants.fingerprint
+
+
+# ----- Graph invariants
+
+class GraphInvariants:
+    """Cheap invariants of a graph that are equal for any two graphs matched by GraphMatch_Orig, so two graphs
+    with different invariants cannot match: the vertex and edge counts, the sorted degree sequence, and the
+    canonical code, which is the multiset of (edge label, source label, target label) triples with the end points'
+    degrees and temporal orders, along with a hash of that code."""
+
+    def __init__(self, graph):
+        self.numVertices = len(graph.vertices)
+        self.numEdges = len(graph.edges)
+        vertexKeys = {}
+        isolatedVertices = []
+        for vertexId, vertex in graph.vertices.items():
+            vertexKey = VertexKey(vertex)
+            vertexKeys[vertexId] = vertexKey
+            if not vertex.edges:
+                isolatedVertices.append(vertexKey)
+        self.degreeSequence = tuple(sorted(vertexKey[1] for vertexKey in vertexKeys.values()))
+        edgeSignatures = {}
+        for edgeId, edge in graph.edges.items():
+            source = vertexKeys[edge.source.id]
+            target = vertexKeys[edge.target.id]
+            if edge.directed:
+                endpoints = (source, target)
+            else:
+                endpoints = frozenset((source, target)) # a set of at most two keys identifies the unordered pair
+            edgeSignatures[edgeId] = (edge.labelId, edge.directed, edge.temporal, endpoints)
+        if edgeSignatures:
+            self.code = (self.numVertices, Multiset(edgeSignatures.values()))
+        elif vertexKeys:
+            self.code = (self.numVertices, next(iter(vertexKeys.values())))
+        else:
+            self.code = (0,)
+        # The code amounts to one round of Weisfeiler-Lehman refinement, each edge relabeled by its end points'
+        # labels and degrees. Further rounds would tell apart graphs that MatchEdge, which never checks for a
+        # consistent vertex mapping, still matches.
+        self.wlHash = hash(self.code)
+        # Kept for GraphMatch_VF2, which needs the keys of individual vertices and edges
+        self.vertexKeys = vertexKeys
+        self.edgeSignatures = edgeSignatures
+        self.isolatedVertices = Multiset(isolatedVertices)
+        self.matchIndex = None # see GetMatchIndex
+        self.fingerprint = None # see Fingerprint
+
+    def differ(self, other):
+        """Returns True if self and other rule out a match; ordered from cheapest to most expensive test."""
+        return ((self.numVertices != other.numVertices) or (self.numEdges != other.numEdges) or
+                (self.wlHash != other.wlHash) or (self.degreeSequence != other.degreeSequence))
+
+def GetInvariants(graph):
+    """Returns the GraphInvariants of the given graph, computing and caching them on the graph the first time."""
+    invariants = getattr(graph, 'invariants', None)
+    if invariants is None:
+        invariants = GraphInvariants(graph)
+        graph.invariants = invariants
+    return invariants
+
+def InvariantsDiffer(graph1, graph2):
+    """Returns True if the cached invariants of the given graphs show that they cannot match."""
+    if (len(graph1.vertices) != len(graph2.vertices)) or (len(graph1.edges) != len(graph2.edges)):
+        return True
+    return GetInvariants(graph1).differ(GetInvariants(graph2))
+
+def Multiset(keys):
+    """Returns a hashable multiset of the given hashable keys."""
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    return frozenset(counts.items())
+
+
+# ----- Canonical codes
+
+def CanonicalCode(graph):
+    """Returns a hashable code for the given graph (cached with its invariants). Graphs matched by GraphMatch_Orig
+    always have equal codes. MatchEdge compares each edge on its attributes, direction and temporal order plus the
+    attributes, degree and temporal order of its end points, so the multiset of these edge signatures, together with
+    the number of vertices, also distinguishes every pair of non-matching graphs."""
+    return GetInvariants(graph).code
+
+def EdgeCode(edge, temporal=False):
+    """Returns the canonical code of the one-edge graph CreateGraphFromEdge(edge) would build (temporally ordered if
+    temporal is True), without building that graph."""
+    sourceTemporal = targetTemporal = edgeTemporal = 0
+    if temporal:
+        timestamps = sorted(set([edge.source.timestamp, edge.target.timestamp, edge.timestamp]))
+        sourceTemporal = timestamps.index(edge.source.timestamp)
+        targetTemporal = timestamps.index(edge.target.timestamp)
+        edgeTemporal = timestamps.index(edge.timestamp)
+    # Both end points are new vertices of degree one in the one-edge graph, even for a self-loop
+    source = (edge.source.labelId, 1, sourceTemporal)
+    target = (edge.target.labelId, 1, targetTemporal)
+    if edge.directed:
+        endpoints = (source, target)
+    else:
+        endpoints = frozenset((source, target))
+    signature = (edge.labelId, edge.directed, edgeTemporal, endpoints)
+    return (2, frozenset([(signature, 1)]))
+
+def VertexKey(vertex):
+    """Returns a hashable key for the vertex properties compared by MatchVertex."""
+    return (vertex.labelId, len(vertex.edges), vertex.temporal)
+
+
+# ----- Attribute labels
+
+# Each distinct attribute dictionary is interned as a small integer label id, so the graph matcher compares integers
+# instead of dictionaries. Id 0 is the empty dictionary. The labelId of a vertex or edge is interned from its attributes
+# when first read and kept until its attributes are assigned or added to (see SetAttributes), so only complete
+# dictionaries are interned; load_from_json interns each vertex or edge once it is loaded (see InternLabel), to number
+# labels in file order.
+gLabelIds = {(): 0}
+
+# Label ids of attribute dictionaries whose label contains "Preserve"; such vertices and edges are not counted in the
+# size of a pattern or graph by evaluation method 3. Set along with the label id, so that each label is checked once.
+gPreservedLabelIds = set()
+
+def LabelId(attributes):
+    """Returns the label id of the given attribute dictionary, assigning the next free id to a new one.
+    Equal dictionaries get equal ids."""
+    key = tuple(sorted(attributes.items()))
+    try:
+        labelId = gLabelIds.get(key)
+    except TypeError:
+        # Unhashable attribute values, e.g. lists from networkx, are keyed on their JSON text instead
+        key = json.dumps(attributes, sort_keys=True, default=repr)
+        labelId = gLabelIds.get(key)
+    if labelId is None:
+        labelId = len(gLabelIds)
+        gLabelIds[key] = labelId
+        label = attributes.get('label')
+        if isinstance(label, str) and ("Preserve" in label):
+            gPreservedLabelIds.add(labelId)
+    return labelId
+
+# Types of attribute values that AttributesKey keys on directly
+gScalarTypes = frozenset((str, int, float, bool, type(None)))
+
+def AttributesKey(attributes):
+    """Returns a hashable key of the given attribute dictionary that is equal for two dictionaries only if they have
+    the same JSON text. Unlike label ids, which follow ==, it tells 1, 1.0 and True apart, and keys in another order.
+    Dictionaries with values other than strings, numbers, booleans and None are keyed on their JSON text."""
+    values = tuple(attributes.values())
+    types = tuple(map(type, values))
+    if not gScalarTypes.issuperset(types):
+        return json.dumps(attributes, default=repr)
+    return (tuple(attributes), types, values)
+
+def SetAttributes(element, attributes):
+    """Sets the attribute dictionary of the given vertex or edge, dropping its label id, which is interned again from
+    the new attributes when next read. Copies of an element can set labelId after the attributes to skip this."""
+    element._attributes = attributes
+    element.__dict__.pop('labelId', None)
+
+def InternLabel(element):
+    """Interns the attributes of the given vertex or edge now, rather than when its label id is first read."""
+    return element.labelId
+
+def Preserved(element):
+    """Returns True if the given vertex or edge has a Preserve label."""
+    return element.labelId in gPreservedLabelIds
+
+
 # ----- Graph Creation
 
 def CreateGraphFromEdge(edge):
@@ -405,14 +814,17 @@ def CreateGraphFromEdge(edge):
     g.vertices["1"] = source
     source.timestamp = edge.source.timestamp
     source.attributes = edge.source.attributes
+    source.labelId = edge.source.labelId
     target = Vertex("2")
     g.vertices["2"] = target
     target.timestamp = edge.target.timestamp
     target.attributes = edge.target.attributes
+    target.labelId = edge.target.labelId
     e = Edge("1", source, target, edge.directed)
     g.edges["1"] = e
     e.timestamp = edge.timestamp
     e.attributes = edge.attributes
+    e.labelId = edge.labelId
     source.edges.append(e)
     target.edges.append(e)
     return g
@@ -427,6 +839,7 @@ def CreateGraphFromInstance(instance):
         newVertex = Vertex(str(vertexId))
         newVertex.timestamp = vertex.timestamp
         newVertex.attributes = vertex.attributes
+        newVertex.labelId = vertex.labelId
         g.vertices[newVertex.id] = newVertex
         vertexMapping[vertex.id] = newVertex
         vertexId += 1
@@ -438,10 +851,129 @@ def CreateGraphFromInstance(instance):
         newEdge = Edge(str(edgeId), source, target, edge.directed)
         newEdge.timestamp = edge.timestamp
         newEdge.attributes = edge.attributes
+        newEdge.labelId = edge.labelId
         g.edges[newEdge.id] = newEdge
         source.edges.append(newEdge)
         target.edges.append(newEdge)
         edgeId += 1
     return g
 
-    
+
+# ----- Graph Input
+
+# Files starting with these bytes are gzip-compressed
+gGzipMagic = b'\x1f\x8b'
+
+# Characters read from a graph file at a time by ReadJsonGraph
+gReadChunkSize = 1 << 16
+
+gJsonWhitespace = re.compile(r'[ \t\n\r]*')
+
+def OpenGraphFile(fileName, mode='r'):
+    """Open the given graph file as text, decompressing it if it is gzip-compressed."""
+    with open(fileName, 'rb') as inputFile:
+        magic = inputFile.read(len(gGzipMagic))
+    if magic == gGzipMagic:
+        return gzip.open(fileName, mode + 't')
+    return open(fileName, mode)
+
+def ReadJsonGraph(fileName):
+    """Yield the vertex and edge objects of the JSON array, or the JSON Lines, in the given, possibly gzip-compressed,
+    file one at a time, reading the file in chunks, so only the object being parsed is held in memory besides the
+    graph built from them."""
+    decoder = json.JSONDecoder()
+    with OpenGraphFile(fileName) as inputFile:
+        buffer = ''
+        position = 0
+        atEnd = False
+        expected = '[' # '[', then 'first' element or ']', then ',' or ']' before each 'next' element; or 'lines'
+        while True:
+            position = gJsonWhitespace.match(buffer, position).end()
+            decoded = False
+            if position < len(buffer):
+                char = buffer[position]
+                if (expected == '[') and (char == '['):
+                    position += 1
+                    expected = 'first'
+                    continue
+                if (expected == '[') and (char == '{'):
+                    expected = 'lines'
+                if ((expected == 'first') or (expected == ',')) and (char == ']'):
+                    return
+                if (expected == ',') and (char == ','):
+                    position += 1
+                    expected = 'next'
+                    continue
+                if expected in ['first', 'next', 'lines']:
+                    # An element, which may not have been read completely yet
+                    try:
+                        jsonObject, position = decoder.raw_decode(buffer, position)
+                        decoded = True
+                    except json.JSONDecodeError:
+                        if atEnd:
+                            raise
+                else:
+                    raise json.JSONDecodeError("Expecting '" + expected + "'", buffer, position)
+            elif atEnd:
+                if expected in ['[', 'lines']: # an empty file holds no JSON Lines
+                    return
+                raise json.JSONDecodeError("Unexpected end of graph file", buffer, position)
+            if not decoded:
+                chunk = inputFile.read(gReadChunkSize)
+                atEnd = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+            else:
+                yield jsonObject
+                if expected != 'lines':
+                    expected = ','
+
+
+# ----- Graph Output
+
+# Vertices and edges encoded and written at a time by WriteJsonGraph
+gWriteChunkSize = 1000
+
+# Returns the JSON text of the given string, escaped as json.dumps would
+JsonString = json.encoder.encode_basestring_ascii
+
+def JsonAttributes(element, attributeCodes):
+    """Returns the JSON text of the attributes of the given vertex or edge. The text is encoded with json.dumps once
+    per distinct attribute dictionary and kept in the given dictionary by AttributesKey."""
+    attributes = element.attributes
+    key = AttributesKey(attributes)
+    code = attributeCodes.get(key)
+    if code is None:
+        code = attributeCodes[key] = json.dumps(attributes)
+    return code
+
+def CreateGraphFile(fileName):
+    """Create the given graph file for writing text, gzip-compressed if its name ends in '.gz'."""
+    if fileName.endswith('.gz'):
+        return gzip.open(fileName, 'wt')
+    return open(fileName, 'w')
+
+def WriteJsonGraph(fileName, elements, jsonLines=False):
+    """Write the given vertices and edges to the given file (see CreateGraphFile) in the JSON graph format: as a JSON
+    array with one object per line, or as JSON Lines if jsonLines is True. The objects are encoded by json_record and
+    written in one block per chunk of gWriteChunkSize objects."""
+    separator = '\n' if jsonLines else ',\n'
+    elements = iter(elements)
+    attributeCodes = {}
+    with CreateGraphFile(fileName) as outputFile:
+        if not jsonLines:
+            outputFile.write('[\n')
+        firstOne = True
+        while True:
+            chunk = [element.json_record(attributeCodes) for element in itertools.islice(elements, gWriteChunkSize)]
+            if not chunk:
+                break
+            if not firstOne:
+                outputFile.write(separator)
+            outputFile.write(separator.join(chunk))
+            firstOne = False
+        if jsonLines:
+            if not firstOne:
+                outputFile.write('\n')
+        else:
+            outputFile.write('\n]\n')
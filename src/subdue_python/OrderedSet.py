@@ -82,3 +82,67 @@ class OrderedSet:
         elements = [x for x in self.list_container if x in int_set]
         return OrderedSet(elements)
     
+
+
+# FrozenOrderedSet is an immutable, hashable version of OrderedSet, used for the vertices and edges of
+# pattern instances. The elements are kept in a tuple (list_container) and a frozenset (set_container),
+# so adding an element with union copies both at C speed instead of re-adding each element in Python,
+# and instances can share and hash their element sets.
+
+class FrozenOrderedSet:
+
+    __slots__ = ('list_container', 'set_container')
+
+    def __init__(self, arg = None):
+        elements = []
+        seen = set()
+        if arg is not None:
+            for x in arg:
+                if x not in seen:
+                    elements.append(x)
+                    seen.add(x)
+        self.list_container = tuple(elements)
+        self.set_container = frozenset(seen)
+
+    def __str__(self):
+        return '{' + ', '.join(str(x) for x in self.list_container) + '}'
+
+    def __iter__(self):
+        return iter(self.list_container)
+
+    def __len__(self):
+        return len(self.list_container)
+
+    def __contains__(self, x):
+        return x in self.set_container
+
+    def __sub__(self, other):
+        return FrozenOrderedSet([x for x in self.list_container if x not in other.set_container])
+
+    def __eq__(self, other):
+        return (self.set_container == other.set_container)
+
+    def __ne__(self, other):
+        return (self.set_container != other.set_container)
+
+    def __hash__(self):
+        return hash(self.set_container)
+
+    def union(self, elements):
+        """Returns a FrozenOrderedSet with the given elements appended, in order, if not already present."""
+        newElements = []
+        for x in elements:
+            if (x not in self.set_container) and (x not in newElements):
+                newElements.append(x)
+        if not newElements:
+            return self
+        newSet = FrozenOrderedSet.__new__(FrozenOrderedSet)
+        newSet.list_container = self.list_container + tuple(newElements)
+        newSet.set_container = self.set_container.union(newElements)
+        return newSet
+
+    def intersect(self, other):
+        return not self.set_container.isdisjoint(other.set_container)
+
+    def intersection(self, other):
+        return FrozenOrderedSet([x for x in self.list_container if x in other.set_container])
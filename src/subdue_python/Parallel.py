@@ -0,0 +1,197 @@
+# Parallel.py
+#
+# Expansion of beam search parent patterns in a pool of worker processes.
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+import subdue_python.CompactGraph as CompactGraph
+
+# The input graph is published once into shared memory, as the flat arrays of a CompactGraph (see PublishGraph), and
+# each worker process attaches a read-only CompactGraph to these arrays without copying them (see AttachGraph), so
+# starting a worker costs the same for any size of graph. Patterns are passed to and from workers as the indices of
+# their instances' vertices and edges in these arrays.
+gGraph = None
+gSharedMemory = None
+gParameters = None
+
+# Patterns with more instances than this are extended in chunks of this many instances, which can be spread over the
+# workers, since a few such patterns often take most of the time of a round
+gChunkSize = 1000
+
+
+class ExpansionPool:
+    """Pool of worker processes that extend and evaluate parent patterns of the given graph."""
+
+    def __init__(self, parameters, graph):
+        self.parameters = parameters
+        self.graph = graph
+        # Vertices and edges of the graph by their index in the published arrays, and vice versa
+        if isinstance(graph, CompactGraph.CompactGraph):
+            compactGraph = graph
+            self.vertices = [CompactGraph.CompactVertex(graph, index) for index in range(len(graph.vertexIds))]
+            self.edges = [CompactGraph.CompactEdge(graph, index) for index in range(len(graph.edgeIds))]
+        else:
+            compactGraph = CompactGraph.CreateCompactGraphFromGraph(graph)
+            self.vertices = list(graph.vertices.values())
+            self.edges = list(graph.edges.values())
+        self.vertexIndex = {vertex: index for index, vertex in enumerate(self.vertices)}
+        self.edgeIndex = {edge: index for index, edge in enumerate(self.edges)}
+        self.sharedMemory, graphState = PublishGraph(compactGraph)
+        try:
+            self.pool = multiprocessing.Pool(parameters.workers, initializer=InitWorker,
+                                             initargs=(graphState, parameters, dict(Graph.gLabelIds),
+                                                       set(Graph.gPreservedLabelIds)))
+        except BaseException:
+            self.sharedMemory.close()
+            self.sharedMemory.unlink()
+            raise
+
+    def extend(self, patterns, budget=None):
+        """Returns, for each given pattern in order, the evaluated list of patterns ExtendPattern creates from it. If the
+        given budget runs out, the workers are terminated and the patterns they had not finished get None instead."""
+        # One task per pattern, except that the instances of patterns with more than gChunkSize instances are extended
+        # in chunks, which are merged into patterns here
+        tasks = []
+        for patternIndex, pattern in enumerate(patterns):
+            states = [self.instance_state(instance) for instance in pattern.instances]
+            if len(states) > gChunkSize:
+                for start in range(0, len(states), gChunkSize):
+                    tasks.append((patternIndex, True, states[start:start + gChunkSize]))
+            else:
+                tasks.append((patternIndex, False, states))
+        # Hand out the largest tasks first and one task at a time, so that workers that are done take over the
+        # remaining tasks until the last one is done
+        order = sorted(range(len(tasks)), key=lambda taskIndex: -len(tasks[taskIndex][2]))
+        results = [None] * len(tasks)
+        for taskIndex, result in self.pool.imap_unordered(RunTask, [(taskIndex,) + tasks[taskIndex][1:] for taskIndex in order]):
+            results[taskIndex] = result
+            if (budget is not None) and budget.exhausted():
+                # The pool cannot take back the tasks it handed out, so stop the workers; see close
+                self.pool.terminate()
+                break
+        # Merge the results in task order, which makes them the same as those of a sequential ExtendPattern
+        patternLists = [[] for pattern in patterns]
+        chunkedInstances = {}
+        for (patternIndex, chunked, states), result in zip(tasks, results):
+            if (result is None) or (patternLists[patternIndex] is None):
+                patternLists[patternIndex] = None
+                chunkedInstances.pop(patternIndex, None)
+            elif chunked:
+                extendedInstances = chunkedInstances.setdefault(patternIndex, {})
+                for instanceState in result:
+                    Pattern.InsertNewInstance(extendedInstances, self.create_instance(instanceState))
+            else:
+                patternLists[patternIndex] = [self.create_pattern(value, instanceStates) for value, instanceStates in result]
+        for patternIndex, extendedInstances in chunkedInstances.items():
+            newPatterns = Pattern.CreateExtendedPatterns(self.parameters, list(extendedInstances.values()))
+            Pattern.EvaluatePatterns(newPatterns, self.graph, self.parameters.eval, self.parameters.overlap)
+            patternLists[patternIndex] = newPatterns
+        return patternLists
+
+    def instance_state(self, instance):
+        return ([self.vertexIndex[vertex] for vertex in instance.vertices], [self.edgeIndex[edge] for edge in instance.edges],
+                instance.alignment)
+
+    def create_instance(self, instanceState):
+        vertexIndices, edgeIndices, alignment = instanceState
+        instance = Pattern.Instance([self.vertices[index] for index in vertexIndices],
+                                    [self.edges[index] for index in edgeIndices])
+        instance.alignment = alignment
+        return instance
+
+    def create_pattern(self, value, instanceStates):
+        instances = [self.create_instance(instanceState) for instanceState in instanceStates]
+        definition = Pattern.CreateInstanceGraph(instances[0], self.parameters.temporal)
+        pattern = Pattern.CreatePatternFromInstances(definition, instances)
+        pattern.value = value
+        return pattern
+
+    def close(self, terminate=False):
+        """Stop the worker processes and free the published graph. If terminate is True, e.g. when discovery fails,
+        the workers are stopped without finishing the tasks they were given."""
+        try:
+            if terminate:
+                self.pool.terminate()
+            else:
+                self.pool.close()
+            self.pool.join()
+        finally:
+            self.sharedMemory.close()
+            self.sharedMemory.unlink()
+
+
+# ----- Worker
+
+def InitWorker(graphState, parameters, labelIds, preservedLabelIds):
+    """Set up a worker process with the published graph and the given parameters. The label ids are those of the main
+    process, so both sides agree on the label id of each attribute dictionary."""
+    global gGraph, gSharedMemory, gParameters
+    Graph.gLabelIds.clear()
+    Graph.gLabelIds.update(labelIds)
+    Graph.gPreservedLabelIds.clear()
+    Graph.gPreservedLabelIds.update(preservedLabelIds)
+    gSharedMemory, gGraph = AttachGraph(graphState)
+    gParameters = parameters
+    Graph.SetMatcher(parameters.matcher, parameters.isomorphism, parameters.matchCacheSize)
+
+def RunTask(task):
+    """Run the given task of ExpansionPool.extend: extend and evaluate a pattern with the given instances, returning
+    the value and instances of each new pattern, or, for a chunk of a pattern's instances, just extend the instances."""
+    taskIndex, chunked, instanceStates = task
+    instances = [CreateInstanceFromState(instanceState) for instanceState in instanceStates]
+    if chunked:
+        return taskIndex, [InstanceState(instance) for instance in Pattern.ExtendInstances(instances)]
+    pattern = Pattern.Pattern()
+    pattern.instances = instances
+    newPatterns = Pattern.ExtendPattern(gParameters, pattern)
+    Pattern.EvaluatePatterns(newPatterns, gGraph, gParameters.eval, gParameters.overlap)
+    return taskIndex, [(newPattern.value, [InstanceState(instance) for instance in newPattern.instances])
+                       for newPattern in newPatterns]
+
+def InstanceState(instance):
+    """Returns the indices of the vertices and edges of the given instance of the worker's graph, and its alignment."""
+    return ([vertex.index for vertex in instance.vertices], [edge.index for edge in instance.edges], instance.alignment)
+
+def CreateInstanceFromState(instanceState):
+    """Returns the instance of the worker's graph with the given vertex and edge indices and alignment."""
+    vertexIndices, edgeIndices, alignment = instanceState
+    instance = Pattern.Instance([CompactGraph.CompactVertex(gGraph, index) for index in vertexIndices],
+                                [CompactGraph.CompactEdge(gGraph, index) for index in edgeIndices])
+    instance.alignment = alignment
+    return instance
+
+
+# ----- Shared graph
+
+def PublishGraph(compactGraph):
+    """Copy the arrays of the given CompactGraph, including its vertex and edge ids as fixed-width string arrays, into
+    a new block of shared memory. Returns the shared memory, which the caller closes and unlinks when done, and the
+    state that AttachGraph needs: the block's name, the layout of the arrays in it, and the graph's attribute table."""
+    arrays = CompactGraph.GraphArrays(compactGraph)
+    layout, size = CompactGraph.ArrayLayout(arrays)
+    sharedMemory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, dtype, shape, offset in layout:
+        array = np.ascontiguousarray(arrays[name])
+        sharedMemory.buf[offset:offset + array.nbytes] = array.tobytes()
+    graphState = (sharedMemory.name, layout, compactGraph.attributeTable, compactGraph.numVertices, compactGraph.numEdges)
+    return sharedMemory, graphState
+
+def AttachGraph(graphState):
+    """Returns the shared memory of the given PublishGraph state, and a CompactGraph whose arrays are read-only views
+    of it. The shared memory must be kept open for as long as the graph is used."""
+    name, layout, attributeTable, numVertices, numEdges = graphState
+    sharedMemory = shared_memory.SharedMemory(name=name)
+    graph = CompactGraph.CompactGraph()
+    for name, dtype, shape, offset in layout:
+        array = np.ndarray(shape, dtype=dtype, buffer=sharedMemory.buf, offset=offset)
+        array.flags.writeable = False
+        setattr(graph, name, array)
+    graph.attributeTable = attributeTable
+    graph.numVertices = numVertices
+    graph.numEdges = numEdges
+    return sharedMemory, graph
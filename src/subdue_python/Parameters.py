@@ -26,6 +26,13 @@ class Parameters:
         self.writeInstances = False   # Write instances of best pattern at iteration i as one graph to file outputFileName-instances-i.json
         self.temporal = False         # Discover static (False) or temporal (True) patterns
         self.eval = 1                 # 1 (Heuristic), 2 (Size)
+        self.matcher = "subdue"       # Graph matcher (subdue, vf2); vf2 is exact, subdue only matches edges without a consistent vertex mapping
+        self.compactGraph = False     # Store input graph in array-backed CompactGraph (True) instead of Graph (False), for large graphs; snapshots are always compact
+        self.isomorphism = "bounded"  # Graph match search (bounded, exact, adaptive); bounded gives up after E^2 mappings, adaptive then retries exact
+        self.matchCacheSize = 10000   # Number of graph match verdicts cached across the run; 0 turns the cache off
+        self.workers = 1              # Number of processes that expand and evaluate parent patterns; 1 expands them in this process
+        self.timeLimit = 0            # Seconds after which discovery stops and returns the best patterns so far; 0 is no limit
+        self.memoryLimit = 0          # Megabytes of memory in use after which discovery stops the same way; 0 is no limit
         self.experimentFolder = ""
         self.beamSearchDebugging = False
     
@@ -68,6 +75,30 @@ class Parameters:
                 overlap_type = args[index]
                 if overlap_type in ["none", "vertex", "edge"]:
                     self.overlap = overlap_type
+            if optionName == "--matcher":
+                index += 1
+                matcher = args[index]
+                if matcher in ["subdue", "vf2"]:
+                    self.matcher = matcher
+            if optionName == "--isomorphism":
+                index += 1
+                isomorphism = args[index]
+                if isomorphism in ["bounded", "exact", "adaptive"]:
+                    self.isomorphism = isomorphism
+            if optionName == "--matchcache":
+                index += 1
+                self.matchCacheSize = int(args[index])
+            if optionName == "--workers":
+                index += 1
+                self.workers = int(args[index])
+            if optionName == "--timelimit":
+                index += 1
+                self.timeLimit = float(args[index])
+            if optionName == "--memorylimit":
+                index += 1
+                self.memoryLimit = float(args[index])
+            if optionName == "--compact":
+                self.compactGraph = True
             if optionName == "--prune":
                 self.prune = True
             if optionName == "--valuebased":
@@ -93,6 +124,13 @@ class Parameters:
         print("  Min Size: " + str(self.minSize))
         print("  Num Best: " + str(self.numBest))
         print("  Overlap: " + self.overlap)
+        print("  Matcher: " + self.matcher)
+        print("  Isomorphism: " + self.isomorphism)
+        print("  Compact Graph: " + str(self.compactGraph))
+        print("  Match Cache Size: " + str(self.matchCacheSize))
+        print("  Workers: " + str(self.workers))
+        print("  Time Limit: " + str(self.timeLimit))
+        print("  Memory Limit: " + str(self.memoryLimit))
         print("  Prune: " + str(self.prune))
         print("  Value Based: " + str(self.valueBased))
         print("  Write Compressed: " + str(self.writeCompressed))
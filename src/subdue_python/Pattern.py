@@ -5,11 +5,14 @@
 # Copyright (c) 2017-2021. Washington State University.
 from termcolor import colored
 
-from subdue_python.OrderedSet import OrderedSet # specialized Subdue version
+from subdue_python.OrderedSet import FrozenOrderedSet # specialized Subdue version
 import subdue_python.Graph as Graph
 import experiment_scripts.evaluation as evaluation
 import experiment_scripts.compute_components as compute
 import uuid
+import collections
+import numpy as np
+import bisect
 import sys
 import os
 import json
@@ -35,18 +38,10 @@ class Pattern:
             self.value = float(len(self.instances) - 1) * (len(self.definition.edges) + len(self.definition.vertices))
 
     def calc_size_wo_preserve_for_edges(self, graph):
-        e = len(graph.edges)
-        for edge_id in graph.edges:
-            if "Preserve" in graph.edges[edge_id].attributes['label']:
-                e = e - 1
-        return e
+        return len(graph.edges) - graph.preserved_counts()[1]
 
     def calc_size_wo_preserve_for_vertices(self, graph):
-        v = len(graph.vertices)
-        for v_id in graph.vertices:
-            if "Preserve" in graph.vertices[v_id].attributes['label']:
-                v = v - 1
-        return v
+        return len(graph.vertices) - graph.preserved_counts()[0]
 
     def evaluate_compression_via_heuristic(self, graph_input):
         """Compute value of using given pattern to compress given graph, where 0 means no compression, and 1 means perfect compression."""
@@ -57,75 +52,34 @@ class Pattern:
         size_of_compressed_graph = self.calc_size_of_compressed_graph(graph_input, overlap)
         self.value = float(self.calc_size(graph_input)) / float(self.calc_size(self.definition) + size_of_compressed_graph)
 
-    # TODO: add overlapping
     def calc_size_of_compressed_graph(self, graph, overlap):
         size = self.calc_size(graph)
         for instance in self.instances:
             size = size + 1
             size_of_instance = len(instance.vertices.list_container) + len(instance.edges.list_container)
             size = size - size_of_instance
+        # vertices and edges shared by overlapping instances are only removed once
+        if overlap != "none":
+            size = size + sum(OverlapCounts(self.instances))
         return size
 
     def calc_size(self, graph):
         size = len(graph.vertices) + len(graph.edges)
         return size
 
-    # def evaluate_compression_via_size_wo_preserved(self, graph_input, overlap):
-    #     size_of_compressed_graph = self.calc_size_of_compressed_graph_wo_preserved(graph_input, overlap)
-    #     self.value = float(self.calc_size_wo_preserved(graph_input)) / float(self.calc_size_wo_preserved(self.definition) + size_of_compressed_graph)
-
     def evaluate_compression_via_size_wo_preserved(self, graph_input, overlap):
         size_of_compressed_graph = self.calc_size_of_compressed_graph(graph_input, overlap)
         self.value = float(self.calc_size(graph_input)) / float(self.calc_size_wo_preserved(self.definition) + size_of_compressed_graph)
 
-    # TODO: add overlapping
-    def calc_size_of_compressed_graph_wo_preserved(self, graph, overlap):
-        size = self.calc_size_wo_preserved(graph)
-        for instance in self.instances:
-            size = size + 1
-
-            e = len(instance.edges.list_container)
-            for edge_id in instance.edges.list_container:
-                if "Preserve" in edge_id.attributes['label']:
-                    e = e - 1
-            v = len(instance.vertices.list_container)
-            for v_id in instance.vertices.list_container:
-                if "Preserve" in v_id.attributes['label']:
-                    v = v - 1
-
-            size = size - (v + e)
-        return size
-
     def calc_size_wo_preserved(self, graph):
-        e = len(graph.edges)
-        for edge_id in graph.edges:
-            if "Preserve" in graph.edges[edge_id].attributes['label']:
-                e = e - 1
-        v = len(graph.vertices)
-        for v_id in graph.vertices:
-            if "Preserve" in graph.vertices[v_id].attributes['label']:
-                v = v - 1
-
-        size = v + e
+        numPreservedVertices, numPreservedEdges = graph.preserved_counts()
+        size = (len(graph.vertices) - numPreservedVertices) + (len(graph.edges) - numPreservedEdges)
         return size
 
     def calc_overlap_edges(self):
-        num_overlap_edges = 0
-
-        instances_list = self.instances
-
-        while instances_list:
-            current_instance = instances_list.pop()
-            # check other instances
-            for instance in instances_list:
-                # loop for every current instance edge...
-                for current_instance_edge in current_instance.edges.list_container:
-                    # over all edges in the other instance
-                    for instance_edge in instance.edges.list_container:
-                        if current_instance_edge.id == instance_edge.id:
-                            num_overlap_edges = num_overlap_edges + 1
-
-        return num_overlap_edges
+        """Returns the number of edges shared by two instances, summed over all pairs of instances."""
+        edgeCounts = collections.Counter(edge for instance in self.instances for edge in instance.edges.list_container)
+        return sum(count * (count - 1) // 2 for count in edgeCounts.values())
 
     def calc_size(self, graph):
         size = len(graph.vertices) + len(graph.edges)
@@ -141,40 +95,35 @@ class Pattern:
             instanceNum += 1
 
     def write_pattern_to_file(self, outputFileName):
-        outputFile = open(outputFileName, 'w')
-        outputFile.write('[\n')
-        for instance in self.instances:
-            instance.write_to_file(outputFile)
-            break
-        outputFile.write('\n]\n')
-        outputFile.close()
-
-    def write_instances_to_file(self, outputFileName, outputDir=""):
-        """Write instances of pattern to given file name in JSON format."""
-        outputFile = open(outputFileName, 'w')
-        outputFile.write('[\n')
-        firstOne = True
-        instancesCounter = 0
-        for instance in self.instances:
-            instancesCounter = instancesCounter + 1
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',\n')
-            instance.write_to_file(outputFile)
-        outputFile.write('\n]\n')
-        outputFile.close()
+        """Write the first instance of pattern to given file name in JSON format."""
+        Graph.WriteJsonGraph(outputFileName, self.instances[0].elements() if self.instances else [])
+
+    def write_instances_to_file(self, outputFileName, outputDir="", jsonLines=False):
+        """Write instances of pattern to given file name in JSON format, or JSON Lines if jsonLines is True (see
+        Graph.WriteJsonGraph)."""
+        elements = (element for instance in self.instances for element in instance.elements())
+        Graph.WriteJsonGraph(outputFileName, elements, jsonLines)
 
         if outputDir != "":
             with open(outputDir + "/subdue_python_count_instances.txt", 'w') as instances_file:
                 instances_file.write("# Pattern 1 \n")
-                instances_file.write(str(instancesCounter) + "\n")
+                instances_file.write(str(len(self.instances)) + "\n")
 
 class Instance:
     
-    def __init__(self):
-        self.vertices = OrderedSet()
-        self.edges = OrderedSet()
+    def __init__(self, vertices=None, edges=None):
+        # Immutable, so extended instances can share them with the instances they extend
+        if not isinstance(vertices, FrozenOrderedSet):
+            vertices = FrozenOrderedSet(vertices)
+        if not isinstance(edges, FrozenOrderedSet):
+            edges = FrozenOrderedSet(edges)
+        self.vertices = vertices
+        self.edges = edges
+        # Instances of a pattern with equal alignment have their vertices in corresponding order, i.e., the i-th
+        # vertices of any two of them are mapped onto each other by an isomorphism. None if not known.
+        self.alignment = None
+        self.graph = None # graph of the instance, see CreateInstanceGraph
+        self.graphTemporal = False # whether graph is temporally ordered
     
     def print_instance (self, instanceNum, tab=""):
         print(tab + "Instance " + str(instanceNum) + ":")
@@ -183,23 +132,14 @@ class Instance:
         for edge in self.edges:
             edge.print_edge(tab+'  ')
             
+    def elements(self):
+        """Returns the vertices and then the edges of the instance."""
+        return list(self.vertices) + list(self.edges)
+
     def write_to_file(self, outputFile):
         """Write instance to given file stream in JSON format."""
-        firstOne = True
-        for vertex in self.vertices:
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',\n')
-            vertex.write_to_file(outputFile)
-        outputFile.write(',\n')
-        firstOne = True
-        for edge in self.edges:
-            if firstOne:
-                firstOne = False
-            else:
-                outputFile.write(',\n')
-            edge.write_to_file(outputFile)
+        attributeCodes = {}
+        outputFile.write(',\n'.join('  ' + element.json_record(attributeCodes) for element in self.elements()))
     
     def max_timestamp(self):
         """Returns the maximum timestamp over all vertices and edges in the instance."""
@@ -211,11 +151,14 @@ class Instance:
 # ----- Pattern and Instance Creation
 
 def CreateInstanceFromEdge(edge):
-    i = Instance()
-    i.edges.add(edge)
-    i.vertices.add(edge.source)
-    i.vertices.add(edge.target)
-    return i
+    instance = Instance([edge.source, edge.target], [edge])
+    # The vertices of one-edge instances with equal edge codes are in corresponding order, unless the edge is
+    # undirected and its end points differ in label; then order them by label. A self-loop has only one vertex.
+    if edge.source == edge.target:
+        instance.alignment = 2
+    else:
+        instance.alignment = int((not edge.directed) and (edge.source.labelId > edge.target.labelId))
+    return instance
 
 def CreatePatternFromInstances(definition, instances):
     """Create pattern from given definition graph and its instances. Note: Pattern not evaluated here."""
@@ -229,64 +172,144 @@ def CreatePatternFromInstances(definition, instances):
 def ExtendPattern (parameters, pattern):
     """Return list of patterns created by extending each instance of the given pattern by one edge in all possible ways,
        and then collecting matching extended instances together into new patterns."""
-    extendedInstances = []
+    return CreateExtendedPatterns(parameters, ExtendInstances(pattern.instances))
 
-    # Expansion
-    for instance in pattern.instances:
+def ExtendInstances(instances):
+    """Return list of the distinct instances created by extending each given instance by one edge in all possible ways,
+       in order of creation."""
+    extendedInstances = {}
+    for instance in instances:
         newInstances = ExtendInstance(instance)
         for newInstance in newInstances:
             InsertNewInstance(extendedInstances, newInstance)
-    newPatterns = []
+    return list(extendedInstances.values())
+
+def CreateExtendedPatterns(parameters, extendedInstances):
+    """Return list of patterns created by collecting matching instances from ExtendInstances together."""
+
+    # Group by extension
+    # Aligned instances (see Instance.alignment) that were extended in the same way are isomorphic, so only one graph
+    # per extension group needs to be built and matched. Temporal orders depend on all timestamps of an instance, so
+    # for temporal patterns each instance is its own group.
+    extensionGroups = {}
+    for index, extendedInstance in enumerate(extendedInstances):
+        key = index if parameters.temporal else extendedInstance.alignment
+        extensionGroups.setdefault(key, []).append(index)
+    for alignment, group in enumerate(extensionGroups.values()):
+        for index in group:
+            extendedInstances[index].alignment = alignment
+
+    # Bucket
+    # Bucket the graph of each extension group by canonical code, and merge the groups in a bucket whose graphs
+    # match into classes of matching instances.
+    buckets = {}
+    for group in extensionGroups.values():
+        groupGraph = CreateInstanceGraph(extendedInstances[group[0]], parameters.temporal)
+        buckets.setdefault(Graph.CanonicalCode(groupGraph), []).append((group, groupGraph))
+    matchClasses = []
+    for bucket in buckets.values():
+        bucketClasses = []
+        for group, groupGraph in bucket:
+            for matchClass in bucketClasses:
+                if Graph.Match(matchClass[0], groupGraph):
+                    matchClass[1].extend(group)
+                    break
+            else:
+                bucketClasses.append((groupGraph, list(group)))
+        matchClasses.extend(bucketClasses)
 
     # Check
-    while extendedInstances:
-        newInstance = extendedInstances.pop(0)
-        newInstanceGraph = Graph.CreateGraphFromInstance(newInstance)
-        if parameters.temporal:
-            newInstanceGraph.TemporalOrder()
-        matchingInstances = [newInstance]
-        nonmatchingInstances = []
-        for extendedInstance in extendedInstances:
-            extendedInstanceGraph = Graph.CreateGraphFromInstance(extendedInstance)
-            if parameters.temporal:
-                extendedInstanceGraph.TemporalOrder()
-            if Graph.GraphMatch(newInstanceGraph, extendedInstanceGraph) and (not InstancesOverlap(parameters.overlap, matchingInstances, extendedInstance)):
-                matchingInstances.append(extendedInstance)
+    # Split each class into patterns of non-overlapping instances, in the order of the extended instances. The first
+    # group of a class starts with the instance its graph was built from.
+    indexedPatterns = []
+    for classGraph, indices in matchClasses:
+        indices.sort()
+        instances = [extendedInstances[index] for index in indices]
+        for group in GroupInstances(parameters.overlap, instances):
+            if group[0] == 0:
+                definition = classGraph
             else:
-                nonmatchingInstances.append(extendedInstance)
-        extendedInstances = nonmatchingInstances
-        newPattern = CreatePatternFromInstances(newInstanceGraph, matchingInstances)
-        newPatterns.append(newPattern)
+                definition = CreateInstanceGraph(instances[group[0]], parameters.temporal)
+            newPattern = CreatePatternFromInstances(definition, [instances[index] for index in group])
+            indexedPatterns.append((indices[group[0]], newPattern))
+
+    # Keep the order of the unbucketed loop, i.e., by the position of each pattern's first instance
+    indexedPatterns.sort(key=lambda indexedPattern: indexedPattern[0])
+    newPatterns = [newPattern for index, newPattern in indexedPatterns]
+
+    # The instance graphs that are still needed are the definitions of the new patterns
+    for extendedInstance in extendedInstances:
+        extendedInstance.graph = None
     return newPatterns
 
+def CreateInstanceGraph(instance, temporal):
+    """Returns the graph of the given instance, temporally ordered if temporal is True. The graph is built on first
+    use and kept on the instance (see Instance.graph), so it must not be changed."""
+    if (instance.graph is None) or (instance.graphTemporal != temporal):
+        instance.graph = Graph.CreateGraphFromInstance(instance)
+        if temporal:
+            instance.graph.TemporalOrder()
+        instance.graphTemporal = temporal
+    return instance.graph
+
 def ExtendInstance (instance):
     """Returns list of new instances created by extending the given instance by one new edge in all possible ways."""
     newInstances = []
-    unusedEdges = OrderedSet([e for v in instance.vertices for e in v.edges]) - instance.edges
-    for edge in unusedEdges:
-        newInstance = ExtendInstanceByEdge(instance, edge)
-        newInstances.append(newInstance)
+    usedEdges = set(instance.edges.set_container)
+    positions = {vertex: position for position, vertex in enumerate(instance.vertices)}
+    alignment = instance if instance.alignment is None else instance.alignment
+    for vertex in instance.vertices:
+        for edge in vertex.edges:
+            if edge not in usedEdges:
+                usedEdges.add(edge)
+                newInstance = ExtendInstanceByEdge(instance, edge)
+                newInstance.alignment = (alignment, ExtensionDescriptor(positions, edge))
+                newInstances.append(newInstance)
     return newInstances
 
+def ExtensionDescriptor(positions, edge):
+    """Returns a hashable description of how the given edge extends an instance, given the positions of the instance's
+    vertices: the edge's label and direction, the positions of its source and target (-1 for a new vertex), and the
+    label of the new vertex, if any. Undirected edges list the new vertex, or else the higher position, last."""
+    source = positions.get(edge.source, -1)
+    target = positions.get(edge.target, -1)
+    newVertexLabelId = None
+    if source < 0:
+        newVertexLabelId = edge.source.labelId
+    elif target < 0:
+        newVertexLabelId = edge.target.labelId
+    if (not edge.directed) and ((source < 0) or (0 <= target < source)):
+        source, target = target, source
+    return (edge.labelId, edge.directed, source, target, newVertexLabelId)
+
 def ExtendInstanceByEdge(instance, edge):
     """Create and return new instance built from given instance and adding given edge and vertices of edge if new."""
-    newInstance = Instance()
-    newInstance.vertices = OrderedSet(instance.vertices)
-    newInstance.edges = OrderedSet(instance.edges)
-    newInstance.edges.add(edge)
-    newInstance.vertices.add(edge.source)
-    newInstance.vertices.add(edge.target)
-    return newInstance
-
-def InsertNewInstance(instanceList, newInstance):
-    """Add newInstance to instanceList if it does not match an instance already on the list."""
-    match = False
-    for instance in instanceList:
-        if (InstanceMatch(instance,newInstance)):
-            match = True
-            break
-    if not match:
-        instanceList.append(newInstance)
+    return Instance(instance.vertices.union((edge.source, edge.target)), instance.edges.union((edge,)))
+
+def OverlapCounts(instances):
+    """Returns the numbers of vertices and of edges by which the given instances overlap, i.e., the number of times
+    a vertex (edge) is in one of the instances beyond the first, summed over all vertices (edges). Takes time linear
+    in the total size of the instances."""
+    numVertices = 0
+    numEdges = 0
+    vertices = set()
+    edges = set()
+    for instance in instances:
+        numVertices += len(instance.vertices.list_container)
+        numEdges += len(instance.edges.list_container)
+        vertices.update(instance.vertices.list_container)
+        edges.update(instance.edges.list_container)
+    return (numVertices - len(vertices), numEdges - len(edges))
+
+def InsertNewInstance(instanceDict, newInstance):
+    """Add newInstance to instanceDict, keyed on its InstanceKey, if it does not match an instance already there.
+    The dictionary keeps the instances in insertion order."""
+    instanceDict.setdefault(InstanceKey(newInstance), newInstance)
+
+def InstanceKey(instance):
+    """Returns a hashable key for the given instance. Two instances have equal keys if and only if they match,
+    i.e., InstanceMatch returns True."""
+    return (instance.vertices.set_container, instance.edges.set_container)
 
 def InstanceMatch(instance1,instance2):
     """Return True if given instances match, i.e., contain the same vertex and edge object instances."""
@@ -316,17 +339,211 @@ def InstanceOverlap(overlap, instance1, instance2):
     else: # overlap == "none"
         return instance1.vertices.intersect(instance2.vertices)
 
+def GroupInstances(overlap, instances):
+    """Split given list of matching instances into groups the way the pairwise loops do: the first group collects,
+    in order, each instance that does not overlap the group so far, the second group does the same with the instances
+    left over, and so on. Returns the groups as lists of indices into instances. Each group keeps the union of its
+    vertices and edges (or its instance keys for overlap="edge"), so testing an instance against a group does not
+    depend on the size of the group."""
+    groups = []
+    groupElements = []
+    for index, instance in enumerate(instances):
+        if overlap == "edge":
+            elements = [InstanceKey(instance)]
+        elif overlap == "vertex":
+            elements = instance.edges.set_container
+        else: # overlap == "none"
+            elements = instance.vertices.set_container
+        for group, usedElements in zip(groups, groupElements):
+            if usedElements.isdisjoint(elements):
+                group.append(index)
+                usedElements.update(elements)
+                break
+        else:
+            groups.append([index])
+            groupElements.append(set(elements))
+    return groups
+
+
+# ----- One-Edge Patterns
+
+class EdgePatternTable:
+    """The one-edge patterns of a graph that have more than one instance: the edges are bucketed by their EdgeCode, in
+    the order of the graph's edges, and each bucket is split into groups by GroupInstances. The table is kept across
+    the iterations of Subdue, and update applies the ChangeSet of a Compress of the graph to it, regrouping only the
+    buckets of the edges that Compress removed or reconnected."""
+
+    def __init__(self, parameters, graph):
+        self.graph = graph
+        self.overlap = parameters.overlap
+        self.temporal = parameters.temporal
+        self.positions = {} # edge id -> position among the graph's edges, which Compress keeps in order
+        self.codes = {} # edge id -> EdgeCode
+        self.buckets = {} # code -> [(position, edge, instance)], in position order
+        self.groups = {} # code -> [(position, definition, instances)], one per group of more than one instance
+        for position, edge in enumerate(graph.edges.values()):
+            code = Graph.EdgeCode(edge, self.temporal)
+            self.positions[edge.id] = position
+            self.codes[edge.id] = code
+            self.buckets.setdefault(code, []).append((position, edge, CreateInstanceFromEdge(edge)))
+        for code in self.buckets:
+            self.group_bucket(code)
+
+    def group_bucket(self, code):
+        bucket = self.buckets[code]
+        instances = [instance for position, edge, instance in bucket]
+        groups = []
+        for group in GroupInstances(self.overlap, instances):
+            if len(group) > 1:
+                position, edge, instance = bucket[group[0]]
+                definition = Graph.CreateGraphFromEdge(edge)
+                if self.temporal:
+                    definition.TemporalOrder()
+                groups.append((position, definition, [instances[index] for index in group]))
+        self.groups[code] = groups
+
+    def patterns(self):
+        """Returns new, unevaluated patterns for the groups, in the order of the edges they were first found on."""
+        groups = sorted((group for groups in self.groups.values() for group in groups), key=lambda group: group[0])
+        patterns = []
+        for position, definition, instances in groups:
+            pattern = Pattern()
+            pattern.definition = definition
+            pattern.instances = list(instances)
+            patterns.append(pattern)
+        return patterns
+
+    def update(self, changes):
+        """Update the table after the graph was compressed with the given ChangeSet. Edges that were not reconnected
+        keep their end points, and so their codes and instances."""
+        touchedCodes = set()
+        for edgeId in changes.removedEdges:
+            touchedCodes.add(self.codes.pop(edgeId))
+            del self.positions[edgeId]
+        rewiredEdges = set(changes.rewiredEdges)
+        movedEntries = {}
+        for edgeId in changes.rewiredEdges:
+            edge = self.graph.edges[edgeId]
+            code = Graph.EdgeCode(edge, self.temporal)
+            touchedCodes.add(self.codes[edgeId])
+            touchedCodes.add(code)
+            self.codes[edgeId] = code
+            movedEntries.setdefault(code, []).append((self.positions[edgeId], edge, CreateInstanceFromEdge(edge)))
+        for code in touchedCodes:
+            bucket = [entry for entry in self.buckets.get(code, [])
+                      if (entry[1].id in self.codes) and (entry[1].id not in rewiredEdges)]
+            bucket.extend(movedEntries.get(code, []))
+            if bucket:
+                bucket.sort(key=lambda entry: entry[0])
+                self.buckets[code] = bucket
+                self.group_bucket(code)
+            else:
+                self.buckets.pop(code, None)
+                self.groups.pop(code, None)
+
+
+# ----- Pattern Evaluation
+
+def EvaluatePatterns(patterns, graph, eval, overlap):
+    """Set the value of each given pattern as Pattern.evaluate would, but for all patterns at once: the instance
+       counts, definition sizes, and instance sizes of the patterns are collected into arrays, and the values of
+       the chosen evaluation method are computed from them in one pass."""
+    if (not patterns) or (eval not in [1, 2, 3, 4]):
+        for pattern in patterns:
+            pattern.evaluate(graph, eval, overlap)
+        return
+    numInstances = np.array([len(pattern.instances) for pattern in patterns], dtype=np.int64)
+    definitionEdges = np.array([len(pattern.definition.edges) for pattern in patterns], dtype=np.int64)
+    definitionVertices = np.array([len(pattern.definition.vertices) for pattern in patterns], dtype=np.int64)
+    if eval == 1:
+        values = ((numInstances - 1) * definitionEdges) / float(len(graph.edges))
+    elif eval == 4:
+        values = (numInstances - 1).astype(np.float64) * (definitionEdges + definitionVertices)
+    else:
+        # Size of the graph compressed by each pattern: one vertex for each instance instead of its vertices and edges
+        instanceSizes = np.fromiter((len(instance.vertices.list_container) + len(instance.edges.list_container)
+                                     for pattern in patterns for instance in pattern.instances),
+                                    dtype=np.int64, count=int(numInstances.sum()))
+        starts = np.concatenate(([0], np.cumsum(numInstances)[:-1]))
+        graphSize = len(graph.vertices) + len(graph.edges)
+        compressedSizes = graphSize + numInstances - np.add.reduceat(instanceSizes, starts)
+        if overlap != "none":
+            compressedSizes += np.array([sum(OverlapCounts(pattern.instances)) for pattern in patterns], dtype=np.int64)
+        definitionSizes = definitionVertices + definitionEdges
+        if eval == 3:
+            definitionSizes -= np.array([sum(pattern.definition.preserved_counts()) for pattern in patterns], dtype=np.int64)
+        values = float(graphSize) / (definitionSizes + compressedSizes).astype(np.float64)
+    for pattern, value in zip(patterns, values.tolist()):
+        pattern.value = value
+
 
 # ----- Pattern List Operations
 
+class PatternList:
+    """List of patterns in decreasing order by value, as kept by PatternListInsert. Besides the patterns, it keeps
+       their negated values in increasing order for bisection, the patterns by canonical code of their definition,
+       since only patterns with the same code can match, and the number of patterns with each value."""
+
+    def __init__(self, patterns=()):
+        self.patterns = []
+        self.keys = []
+        self.buckets = {}
+        self.valueCounts = {}
+        for pattern in patterns:
+            self.add(pattern)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+    def __getitem__(self, index):
+        return self.patterns[index]
+
+    def add(self, pattern):
+        """Insert pattern after the patterns with the same or higher value."""
+        index = bisect.bisect_right(self.keys, -pattern.value)
+        self.patterns.insert(index, pattern)
+        self.keys.insert(index, -pattern.value)
+        # Keep each bucket in list order too, so that PatternListInsert matches against its patterns in that order
+        bucket = self.buckets.setdefault(Graph.CanonicalCode(pattern.definition), [])
+        bucketIndex = len(bucket)
+        while (bucketIndex > 0) and (bucket[bucketIndex - 1].value < pattern.value):
+            bucketIndex -= 1
+        bucket.insert(bucketIndex, pattern)
+        self.valueCounts[pattern.value] = self.valueCounts.get(pattern.value, 0) + 1
+
+    def remove(self, pattern):
+        index = bisect.bisect_left(self.keys, -pattern.value)
+        while self.patterns[index] is not pattern:
+            index += 1
+        self.pop(index)
+
+    def pop(self, index=-1):
+        pattern = self.patterns.pop(index)
+        self.keys.pop(index)
+        bucket = self.buckets[Graph.CanonicalCode(pattern.definition)]
+        bucket.remove(pattern)
+        if not bucket:
+            del self.buckets[Graph.CanonicalCode(pattern.definition)]
+        self.valueCounts[pattern.value] -= 1
+        if self.valueCounts[pattern.value] == 0:
+            del self.valueCounts[pattern.value]
+        return pattern
+
+    def matching_patterns(self, pattern):
+        """Returns the patterns on the list that may match the given pattern, in list order."""
+        return self.buckets.get(Graph.CanonicalCode(pattern.definition), [])
+
 def PatternListInsert(newPattern, patternList, maxLength, valueBased, beamSearchDebugging=False, experimentFolder=None, limitCount=None):
-    """Insert newPattern into patternList. If newPattern is isomorphic to an existing pattern on patternList, then keep higher-valued
+    """Insert newPattern into patternList, a PatternList. If newPattern is isomorphic to an existing pattern on patternList, then keep higher-valued
        pattern. The list is kept in decreasing order by pattern value. If valueBased=True, then maxLength represents the maximum number
        of different-valued patterns on the list; otherwise, maxLength represents the maximum number of patterns on the list.
        Assumes given patternList already conforms to maximums."""
     # Check if newPattern unique (i.e., non-isomorphic or isomorphic but better-valued)
-    for pattern in patternList:
-        if (Graph.GraphMatch(pattern.definition, newPattern.definition)):
+    for pattern in patternList.matching_patterns(newPattern):
+        if (Graph.Match(pattern.definition, newPattern.definition)):
             if (pattern.value >= newPattern.value):
                 return # newPattern already on list with same or better value
             else:
@@ -334,36 +551,26 @@ def PatternListInsert(newPattern, patternList, maxLength, valueBased, beamSearch
                 patternList.remove(pattern)
                 break
 
-    # pattern list before
-
     # newPattern unique, so insert in order by value
-    insertAtIndex = 0
-    for pattern in patternList:
-        if newPattern.value > pattern.value:
-            break
-        insertAtIndex += 1
-    patternList.insert(insertAtIndex, newPattern)
-
-    # pattern list with new pattern
+    patternList.add(newPattern)
 
     # check if patternList needs to be trimmed
     if valueBased:
-        uniqueValues = UniqueValues(patternList)
-        if len(uniqueValues) > maxLength:
-            removeValue = uniqueValues[-1]
+        if len(patternList.valueCounts) > maxLength:
+            removeValue = patternList[-1].value
             while (patternList[-1].value == removeValue):
                 patternList.pop(-1)
     else:
         if len(patternList) > maxLength:
             patternList.pop(-1)
 
-    # pattern list with new pattern trimmed based on beam width
-
 
 def UniqueValues(patternList):
     """Returns list of unique values of patterns in given pattern list, in same order."""
     uniqueValues = []
+    seenValues = set()
     for pattern in patternList:
-        if pattern.value not in uniqueValues:
+        if pattern.value not in seenValues:
+            seenValues.add(pattern.value)
             uniqueValues.append(pattern.value)
     return uniqueValues
@@ -6,13 +6,13 @@
 
 import sys
 import time
-import json
 import contextlib
-import src.subdue_python.Graph as Graph
-import src.subdue_python.Pattern as Pattern
-import src.subdue_python.Parameters as Parameters
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+import subdue_python.Parameters as Parameters
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Parallel as Parallel
 import os
-import json
 from random import randrange
 import src.experiment_scripts.compute_components
 from termcolor import colored
@@ -26,7 +26,7 @@ def main():
     parameters.set_parameters(sys.argv)
 
     # Read graph and save it in the graph data structure
-    graph = read_graph(parameters.inputFileName)
+    graph = read_graph(parameters.inputFileName, parameters.compactGraph)
 
     parameters.set_defaults_for_graph(graph)
 
@@ -37,20 +37,26 @@ def main():
     subdue(parameters, graph)
 
 
-def read_graph(input_file_name):
+def read_graph(input_file_name, compact=False):
     """
-    Read graph from given filename.
+    Read graph from given JSON or JSON Lines file, which may be gzip-compressed, into a CompactGraph if compact is True.
+    Files with the extension CompactGraph.gSnapshotExtension are read as graph snapshots (see CompactGraph.WriteSnapshot),
+    always into a memory-mapped CompactGraph, since building a Graph from one costs as much as reading the JSON file.
     """
 
-    # Load graph from file
-    with open(input_file_name, 'r') as input_graph_file:
-        json_graph = json.load(input_graph_file)
+    if input_file_name.endswith(CompactGraph.gSnapshotExtension):
+        return CompactGraph.ReadSnapshot(input_file_name)
 
-        # Create graph data structure
+    # Create graph data structure
+    if compact:
+        graph = CompactGraph.CompactGraph()
+    else:
         graph = Graph.Graph()
-        graph.load_from_json(json_graph)
 
-        return graph
+    # Load graph from file, one vertex or edge at a time
+    graph.load_from_json(Graph.ReadJsonGraph(input_file_name))
+
+    return graph
 
 
 def subdue(parameters, graph):
@@ -65,10 +71,17 @@ def subdue(parameters, graph):
 
     iteration = 1
     done = False
+    Graph.SetMatcher(parameters.matcher, parameters.isomorphism, parameters.matchCacheSize)
 
     # Store found pattern as list
     patterns = list()
 
+    # One-edge patterns of the graph, updated with the changes of each compression instead of being found again
+    edge_pattern_table = Pattern.EdgePatternTable(parameters, graph)
+
+    # Time and memory budgets of the whole run
+    budget = Budget(parameters)
+
     # Iterate
     while (iteration <= parameters.iterations) and (not done):
 
@@ -84,7 +97,15 @@ def subdue(parameters, graph):
 
         # 1. PHASE: Start with substructure discovery
         # Temporary list of found patterns in this iteration
-        pattern_list = substructure_discover(parameters, graph)
+        Graph.ResetMatchStatistics()
+        pattern_list = substructure_discover(parameters, graph, edge_pattern_table, budget)
+
+        if not parameters.beamSearchDebugging:
+            print(Graph.MatchStatisticsString())
+
+        if pattern_list.truncated:
+            done = True
+            print("Budget exhausted, reporting the best patterns found so far.\n")
 
         if (not pattern_list):
             done = True
@@ -113,7 +134,8 @@ def subdue(parameters, graph):
             #     pattern_list[0].write_instances_to_file(outputFileName, parameters.experimentFolder)
 
             if ((iteration < parameters.iterations) or (parameters.writeCompressed)):
-                graph.Compress(iteration, pattern_list[0])
+                changes = graph.Compress(iteration, pattern_list[0])
+                edge_pattern_table.update(changes)
             if (iteration < parameters.iterations):
                 # consider another iteration
                 if (len(graph.edges) == 0):
@@ -130,15 +152,23 @@ def subdue(parameters, graph):
     return patterns
 
 
-def substructure_discover(parameters, graph):
+def substructure_discover(parameters, graph, edge_pattern_table=None, budget=None):
     """
     The main discovery loop. Finds and returns best patterns in given graph.
 
     :param graph: Instance of Subdue.Graph
     :param parameters: Instance of Subdue.Parameters
-    :return: Best patterns in the given graph for the current iteration
+    :param edge_pattern_table: Pattern.EdgePatternTable of the graph kept across iterations, or None
+    :param budget: Budget of the run, or None to start one for this call
+    :return: Best patterns in the given graph for the current iteration, as DiscoveredPatterns
     """
 
+    if budget is None:
+        budget = Budget(parameters)
+
+    # Whether the search stopped because the budget ran out
+    truncated = False
+
     # How many times the root loop was run
     root_count = 0
 
@@ -146,7 +176,7 @@ def substructure_discover(parameters, graph):
     pattern_count = 0
 
     # Get initial one-edge patterns
-    parent_pattern_list = get_initial_patterns(parameters, graph)
+    parent_pattern_list = get_initial_patterns(parameters, graph, edge_pattern_table)
 
     if parameters.beamSearchDebugging:
         print("-----------------------------")
@@ -169,207 +199,243 @@ def substructure_discover(parameters, graph):
         for parent in parent_pattern_list:
             print("compression of pattern: " + str(parent.value))
 
-    discoveredPatternList = []
-
-    while ((pattern_count < parameters.limit) and parent_pattern_list):
-
-        # Only for debugging purposes
-        root_count += 1
-
-        if parameters.beamSearchDebugging:
-            if pattern_count > 0:
-                print(colored("Deleting child patterns...", "yellow"))
-
-        childPatternList = []
-
-        if parameters.beamSearchDebugging:
-            step = "3. current"
-            for pattern in parent_pattern_list:
-                value = "%.4f" % pattern.value
-                path = parameters.experimentFolder + "/beam_search/" + step + "/parents/" + str(root_count) + "_" + str(
-                    pattern_count) + "/"
-                name = "c_" + str(value) + \
-                       "__i_" + str(len(pattern.instances)) + \
-                       "__" + str(randrange(1000))
-                os.makedirs(os.path.dirname(path), exist_ok=True)
-                pattern.write_pattern_to_file(path + name + ".json")
-                pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
-                    path + name + ".json")
-                plot_graphs([pattern_nx], path + name)
-
-        # iterate parent patterns
-        # https://stackoverflow.com/questions/6022764/python-removing-list-element-while-iterating-over-list?noredirect=1&lq=1
-        #
-        copy_of_parent_pattern_list = [x for x in parent_pattern_list]
-        for parent_pattern in list(parent_pattern_list):
-        #while (parent_pattern_list):
+    discoveredPatternList = Pattern.PatternList()
 
-            if parameters.beamSearchDebugging:
-                print(colored("-----------------------------", "green"))
-                print(colored("Start a parent pattern loop", "green"))
-                print("limit: " + str(pattern_count))
-                print("parent patterns: " + str(len(parent_pattern_list)))
+    # Pool of worker processes that expand the parent patterns, if requested
+    expansionPool = None
+    if parameters.workers > 1:
+        expansionPool = Parallel.ExpansionPool(parameters, graph)
+
+    try:
+        while ((pattern_count < parameters.limit) and parent_pattern_list and (not truncated)):
 
+            # Only for debugging purposes
+            root_count += 1
 
-         #   parentPattern = parent_pattern_list.pop(0)
+            if parameters.beamSearchDebugging:
+                if pattern_count > 0:
+                    print(colored("Deleting child patterns...", "yellow"))
+
+            childPatternList = Pattern.PatternList()
+
+            # Expand and evaluate the parent patterns that this round will expand in the worker processes up front. The
+            # extended patterns are still inserted into the child list in parent order below, so the beam is the same as
+            # with sequential expansion.
+            expandedPatternLists = None
+            if expansionPool and not budget.exhausted():
+                count = pattern_count
+                expandedParents = []
+                for parent_pattern in parent_pattern_list:
+                    if is_extendable(parameters, parent_pattern, count):
+                        count += 1
+                        expandedParents.append(parent_pattern)
+                expandedPatternLists = expansionPool.extend(expandedParents, budget)
 
             if parameters.beamSearchDebugging:
                 step = "3. current"
-                value = "%.4f" % parent_pattern.value
-                path = parameters.experimentFolder + "/beam_search/" + step + "/parent/" + str(
-                        root_count) + "_" + str(
+                for pattern in parent_pattern_list:
+                    value = "%.4f" % pattern.value
+                    path = parameters.experimentFolder + "/beam_search/" + step + "/parents/" + str(root_count) + "_" + str(
                         pattern_count) + "/"
-                name = "c_" + str(value) + \
-                           "__i_" + str(len(parent_pattern.instances)) + \
+                    name = "c_" + str(value) + \
+                           "__i_" + str(len(pattern.instances)) + \
                            "__" + str(randrange(1000))
-                os.makedirs(os.path.dirname(path), exist_ok=True)
-                parent_pattern.write_pattern_to_file(path + name + ".json")
-                pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    pattern.write_pattern_to_file(path + name + ".json")
+                    pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
                         path + name + ".json")
-                plot_graphs([pattern_nx], path + name)
+                    plot_graphs([pattern_nx], path + name)
+
+            # iterate parent patterns
+            # https://stackoverflow.com/questions/6022764/python-removing-list-element-while-iterating-over-list?noredirect=1&lq=1
+            #
+            copy_of_parent_pattern_list = [x for x in parent_pattern_list]
+            for parent_pattern in list(parent_pattern_list):
+            #while (parent_pattern_list):
 
-            # TODO: > 1 sinn? warum auf parent und nicht extended
-            if ((len(parent_pattern.instances) > 1) and (pattern_count < parameters.limit) and len(parent_pattern.definition.edges) + 1 <= parameters.maxSize):
-                pattern_count += 1
+                # Stop cleanly when the budget runs out: the parents left are discovered without being extended, except
+                # for those the worker processes extended before it ran out, and the children so far are added to the
+                # discovered list below
+                if (not truncated) and budget.exhausted():
+                    truncated = True
 
                 if parameters.beamSearchDebugging:
-                    print("start expansion...")
+                    print(colored("-----------------------------", "green"))
+                    print(colored("Start a parent pattern loop", "green"))
+                    print("limit: " + str(pattern_count))
+                    print("parent patterns: " + str(len(parent_pattern_list)))
+
 
-                extendedPatternList = Pattern.ExtendPattern(parameters, parent_pattern)
+             #   parentPattern = parent_pattern_list.pop(0)
 
                 if parameters.beamSearchDebugging:
-                    step = "2. expansion"
-                    for pattern in extendedPatternList:
-                        path = parameters.experimentFolder + "/beam_search/" + step + "/" + str(root_count) + "_" + str(pattern_count) + "/"
-                        name = "i_" + str(len(pattern.instances)) + \
+                    step = "3. current"
+                    value = "%.4f" % parent_pattern.value
+                    path = parameters.experimentFolder + "/beam_search/" + step + "/parent/" + str(
+                            root_count) + "_" + str(
+                            pattern_count) + "/"
+                    name = "c_" + str(value) + \
+                               "__i_" + str(len(parent_pattern.instances)) + \
                                "__" + str(randrange(1000))
-                        os.makedirs(os.path.dirname(path), exist_ok=True)
-                        pattern.write_pattern_to_file(path + name + ".json")
-                        pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    parent_pattern.write_pattern_to_file(path + name + ".json")
+                    pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
                             path + name + ".json")
-                        plot_graphs([pattern_nx], path + name)
-
-                if parameters.beamSearchDebugging:
-                    print("expanded patterns: " + str(len(extendedPatternList)))
-
-                while (extendedPatternList):
-                    extendedPattern = extendedPatternList.pop(0)
+                    plot_graphs([pattern_nx], path + name)
 
-                    # only evaluate compression if #edges is lower then the defined max size
-                    # TODO: vor expansion ziehen
-                #if (len(extendedPattern.definition.edges) <= parameters.maxSize):
+                if is_extendable(parameters, parent_pattern, pattern_count):
+                    pattern_count += 1
 
-                    # evaluate the compression of each extension
-                    extendedPattern.evaluate(graph, parameters.eval, parameters.overlap)
+                    if parameters.beamSearchDebugging:
+                        print("start expansion...")
+
+                    if expandedPatternLists is not None:
+                        extendedPatternList = expandedPatternLists.pop(0) or []
+                    elif not truncated:
+                        extendedPatternList = Pattern.ExtendPattern(parameters, parent_pattern)
+                        # evaluate the compression of each extension (done by the worker processes otherwise)
+                        Pattern.EvaluatePatterns(extendedPatternList, graph, parameters.eval, parameters.overlap)
+                    else:
+                        extendedPatternList = []
 
                     if parameters.beamSearchDebugging:
                         step = "2. expansion"
-                        value = "%.4f" % extendedPattern.value
-                        path = parameters.experimentFolder + "/beam_search/" + step + "/" + str(
-                                root_count) + "_" + str(pattern_count) + "/"
-                        name = "c_" + str(value) + \
-                                   "__i_" + str(len(extendedPattern.instances)) + \
+                        for pattern in extendedPatternList:
+                            path = parameters.experimentFolder + "/beam_search/" + step + "/" + str(root_count) + "_" + str(pattern_count) + "/"
+                            name = "i_" + str(len(pattern.instances)) + \
                                    "__" + str(randrange(1000))
-                        os.makedirs(os.path.dirname(path), exist_ok=True)
-                        extendedPattern.write_pattern_to_file(path + name + ".json")
-                        pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
+                            os.makedirs(os.path.dirname(path), exist_ok=True)
+                            pattern.write_pattern_to_file(path + name + ".json")
+                            pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
                                 path + name + ".json")
-                        plot_graphs([pattern_nx], path + name)
-
+                            plot_graphs([pattern_nx], path + name)
 
                     if parameters.beamSearchDebugging:
-                        print("compression before: " + str(parent_pattern.value) + ", after: " + str(extendedPattern.value))
+                        print("expanded patterns: " + str(len(extendedPatternList)))
+
+                    while (extendedPatternList):
+                        extendedPattern = extendedPatternList.pop(0)
+
+                        # only evaluate compression if #edges is lower then the defined max size
+                        # TODO: vor expansion ziehen
+                    #if (len(extendedPattern.definition.edges) <= parameters.maxSize):
 
-                    # prune = false --> add pattern to child patterns
-                    # prune = true --> add pattern to child patterns only if the extended pattern has higher compression
-                    # child pattern are used for the next expansion
-                    if ((not parameters.prune) or (extendedPattern.value >= parent_pattern.value)):
-                        Pattern.PatternListInsert(extendedPattern, childPatternList, parameters.beamWidth, parameters.valueBased)
                         if parameters.beamSearchDebugging:
-                             print(colored("Add extended pattern to child patterns", "grey"))
-                    else:
+                            step = "2. expansion"
+                            value = "%.4f" % extendedPattern.value
+                            path = parameters.experimentFolder + "/beam_search/" + step + "/" + str(
+                                    root_count) + "_" + str(pattern_count) + "/"
+                            name = "c_" + str(value) + \
+                                       "__i_" + str(len(extendedPattern.instances)) + \
+                                       "__" + str(randrange(1000))
+                            os.makedirs(os.path.dirname(path), exist_ok=True)
+                            extendedPattern.write_pattern_to_file(path + name + ".json")
+                            pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(
+                                    path + name + ".json")
+                            plot_graphs([pattern_nx], path + name)
+
+
                         if parameters.beamSearchDebugging:
-                            print(colored("Too bad compression. Do not add extended pattern to child patterns", "grey"))
-            else:
-                if parameters.beamSearchDebugging:
-                    print("Limit reached, no expansion anymore")
+                            print("compression before: " + str(parent_pattern.value) + ", after: " + str(extendedPattern.value))
+
+                        # prune = false --> add pattern to child patterns
+                        # prune = true --> add pattern to child patterns only if the extended pattern has higher compression
+                        # child pattern are used for the next expansion
+                        if ((not parameters.prune) or (extendedPattern.value >= parent_pattern.value)):
+                            Pattern.PatternListInsert(extendedPattern, childPatternList, parameters.beamWidth, parameters.valueBased)
+                            if parameters.beamSearchDebugging:
+                                 print(colored("Add extended pattern to child patterns", "grey"))
+                        else:
+                            if parameters.beamSearchDebugging:
+                                print(colored("Too bad compression. Do not add extended pattern to child patterns", "grey"))
+                else:
+                    if parameters.beamSearchDebugging:
+                        print("Limit reached, no expansion anymore")
+
+                # add parent pattern to final discovered list
+                if (len(parent_pattern.definition.edges) >= parameters.minSize):
+                    Pattern.PatternListInsert(parent_pattern, discoveredPatternList, parameters.numBest, False)
+                    if parameters.beamSearchDebugging:
+                        print("Add the parent pattern to the final patterns")
+                else:
+                    if parameters.beamSearchDebugging:
+                        print(colored("Pattern to small. Its not a good pattern", "red"))
 
-            # add parent pattern to final discovered list
-            if (len(parent_pattern.definition.edges) >= parameters.minSize):
-                Pattern.PatternListInsert(parent_pattern, discoveredPatternList, parameters.numBest, False)
-                if parameters.beamSearchDebugging:
-                    print("Add the parent pattern to the final patterns")
-            else:
                 if parameters.beamSearchDebugging:
-                    print(colored("Pattern to small. Its not a good pattern", "red"))
+                    step = "3. current"
+                    for pattern in discoveredPatternList:
+                        value = "%.4f" % pattern.value
+                        path = parameters.experimentFolder + "/beam_search/" + step + "/discovered/" + str(root_count) + "_" + str(pattern_count) + "/"
+                        name = "c_" + str(value) + \
+                               "__i_" + str(len(pattern.instances)) + \
+                               "__" + str(randrange(1000))
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        pattern.write_pattern_to_file(path + name + ".json")
+                        pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
+                        plot_graphs([pattern_nx], path + name)
+                    for pattern in childPatternList:
+                        value = "%.4f" % pattern.value
+                        path = parameters.experimentFolder + "/beam_search/" + step + "/child/" + str(root_count) + "_" + str(pattern_count) + "/"
+                        name = "c_" + str(value) + \
+                               "__i_" + str(len(pattern.instances)) + \
+                               "__" + str(randrange(1000))
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        pattern.write_pattern_to_file(path + name + ".json")
+                        pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
+                        plot_graphs([pattern_nx], path + name)
 
-            if parameters.beamSearchDebugging:
-                step = "3. current"
-                for pattern in discoveredPatternList:
-                    value = "%.4f" % pattern.value
-                    path = parameters.experimentFolder + "/beam_search/" + step + "/discovered/" + str(root_count) + "_" + str(pattern_count) + "/"
-                    name = "c_" + str(value) + \
-                           "__i_" + str(len(pattern.instances)) + \
-                           "__" + str(randrange(1000))
-                    os.makedirs(os.path.dirname(path), exist_ok=True)
-                    pattern.write_pattern_to_file(path + name + ".json")
-                    pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
-                    plot_graphs([pattern_nx], path + name)
-                for pattern in childPatternList:
-                    value = "%.4f" % pattern.value
-                    path = parameters.experimentFolder + "/beam_search/" + step + "/child/" + str(root_count) + "_" + str(pattern_count) + "/"
-                    name = "c_" + str(value) + \
-                           "__i_" + str(len(pattern.instances)) + \
-                           "__" + str(randrange(1000))
-                    os.makedirs(os.path.dirname(path), exist_ok=True)
-                    pattern.write_pattern_to_file(path + name + ".json")
-                    pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
-                    plot_graphs([pattern_nx], path + name)
+                # if parameters.beamSearchDebugging:
+                #     step = "3. current"
+                #     for pattern in discoveredPatternList:
+                #         value = "%.4f" % pattern.value
+                #         path = parameters.experimentFolder + "/beam_search/" + step + "/discovered/" + str(root_count) + "_" + str(pattern_count) + "/"
+                #         name = "c_" + str(value) + \
+                #                "__i_" + str(len(pattern.instances)) + \
+                #                "__" + str(randrange(1000))
+                #         os.makedirs(os.path.dirname(path), exist_ok=True)
+                #         pattern.write_pattern_to_file(path + name + ".json")
+                #         pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
+                #         plot_graphs([pattern_nx], path + name)
+                #     for pattern in childPatternList:
+                #         value = "%.4f" % pattern.value
+                #         path = parameters.experimentFolder + "/beam_search/" + step + "/child/" + str(root_count) + "_" + str(pattern_count) + "/"
+                #         name = "c_" + str(value) + \
+                #                "__i_" + str(len(pattern.instances)) + \
+                #                "__" + str(randrange(1000))
+                #         os.makedirs(os.path.dirname(path), exist_ok=True)
+                #         pattern.write_pattern_to_file(path + name + ".json")
+                #         pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
+                #         plot_graphs([pattern_nx], path + name)
+                #     for pattern in parent_pattern_list:
+                #         value = "%.4f" % pattern.value
+                #         path = parameters.experimentFolder + "/beam_search/" + step + "/parent/" + str(root_count) + "_" + str(pattern_count) + "/"
+                #         name = "c_" + str(value) + \
+                #                "__i_" + str(len(pattern.instances)) + \
+                #                "__" + str(randrange(1000))
+                #         os.makedirs(os.path.dirname(path), exist_ok=True)
+                #         pattern.write_pattern_to_file(path + name + ".json")
+                #         pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
+                #         plot_graphs([pattern_nx], path + name)
 
-            # if parameters.beamSearchDebugging:
-            #     step = "3. current"
-            #     for pattern in discoveredPatternList:
-            #         value = "%.4f" % pattern.value
-            #         path = parameters.experimentFolder + "/beam_search/" + step + "/discovered/" + str(root_count) + "_" + str(pattern_count) + "/"
-            #         name = "c_" + str(value) + \
-            #                "__i_" + str(len(pattern.instances)) + \
-            #                "__" + str(randrange(1000))
-            #         os.makedirs(os.path.dirname(path), exist_ok=True)
-            #         pattern.write_pattern_to_file(path + name + ".json")
-            #         pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
-            #         plot_graphs([pattern_nx], path + name)
-            #     for pattern in childPatternList:
-            #         value = "%.4f" % pattern.value
-            #         path = parameters.experimentFolder + "/beam_search/" + step + "/child/" + str(root_count) + "_" + str(pattern_count) + "/"
-            #         name = "c_" + str(value) + \
-            #                "__i_" + str(len(pattern.instances)) + \
-            #                "__" + str(randrange(1000))
-            #         os.makedirs(os.path.dirname(path), exist_ok=True)
-            #         pattern.write_pattern_to_file(path + name + ".json")
-            #         pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
-            #         plot_graphs([pattern_nx], path + name)
-            #     for pattern in parent_pattern_list:
-            #         value = "%.4f" % pattern.value
-            #         path = parameters.experimentFolder + "/beam_search/" + step + "/parent/" + str(root_count) + "_" + str(pattern_count) + "/"
-            #         name = "c_" + str(value) + \
-            #                "__i_" + str(len(pattern.instances)) + \
-            #                "__" + str(randrange(1000))
-            #         os.makedirs(os.path.dirname(path), exist_ok=True)
-            #         pattern.write_pattern_to_file(path + name + ".json")
-            #         pattern_nx = experiment_scripts.compute_components.convert_node_link_graph_to_nx_graph(path + name + ".json")
-            #         plot_graphs([pattern_nx], path + name)
+                if parameters.beamSearchDebugging:
+                    print(colored("discovered patterns: " + str(len(discoveredPatternList)), "blue"))
+                    print(colored("parent patterns: " + str(len(parent_pattern_list)), "blue"))
+                    print(colored("child patterns: " + str(len(childPatternList)), "blue"))
+                
+            if parameters.beamSearchDebugging:
+                print(colored("Parent pattern loop finished", "magenta"))
 
             if parameters.beamSearchDebugging:
-                print(colored("discovered patterns: " + str(len(discoveredPatternList)), "blue"))
-                print(colored("parent patterns: " + str(len(parent_pattern_list)), "blue"))
-                print(colored("child patterns: " + str(len(childPatternList)), "blue"))
-                
-        if parameters.beamSearchDebugging:
-            print(colored("Parent pattern loop finished", "magenta"))
+                print(colored("Set parent patterns with child patterns...", "yellow"))
+            parent_pattern_list = childPatternList
+    except BaseException:
+        # Stop the workers, whatever they are running, and free the shared graph if discovery fails
+        if expansionPool:
+            expansionPool.close(terminate=True)
+        raise
 
-        if parameters.beamSearchDebugging:
-            print(colored("Set parent patterns with child patterns...", "yellow"))
-        parent_pattern_list = childPatternList
+    if expansionPool:
+        expansionPool.close()
 
     if parameters.beamSearchDebugging:
         print(colored("Insert any remaining patterns in parent list on to discovered list", "magenta"))
@@ -398,52 +464,80 @@ def substructure_discover(parameters, graph):
                 path + name + ".json")
             plot_graphs([pattern_nx], path + name)
 
-    return discoveredPatternList
+    return DiscoveredPatterns(discoveredPatternList, truncated)
+
+
+class DiscoveredPatterns(list):
+    """
+    List of the best patterns substructure_discover found, best first. Truncated is True if the search stopped early
+    because its Budget ran out, in which case these are the best patterns found so far.
+    """
+
+    def __init__(self, patterns=(), truncated=False):
+        super().__init__(patterns)
+        self.truncated = truncated
+
+
+class Budget:
+    """
+    The time and memory budgets of the given parameters (timeLimit and memoryLimit) for a run of Subdue, starting now.
+    The memory budget is soft: it is checked between the expansions of parent patterns, and as each worker process
+    finishes a task.
+    """
+
+    def __init__(self, parameters):
+        self.deadline = None
+        if parameters.timeLimit > 0:
+            self.deadline = time.time() + parameters.timeLimit
+        self.memoryLimit = None
+        if parameters.memoryLimit > 0:
+            self.memoryLimit = parameters.memoryLimit * 1024 * 1024
+        self.spent = False
+
+    def exhausted(self):
+        """Returns True if the time or memory budget has run out. Once it has, it stays out, even if memory is freed."""
+        if not self.spent:
+            self.spent = (((self.deadline is not None) and (time.time() >= self.deadline)) or
+                          ((self.memoryLimit is not None) and (memory_usage() >= self.memoryLimit)))
+        return self.spent
+
+
+def memory_usage():
+    """
+    Returns the memory in use by this process in bytes, i.e., its resident set size, or its peak resident set size
+    where the current one is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # In kilobytes, except on macOS
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def is_extendable(parameters, pattern, pattern_count):
+    """
+    Returns True if the given parent pattern is to be extended, given the number of patterns extended so far.
+    """
+    # TODO: > 1 sinn? warum auf parent und nicht extended
+    return ((len(pattern.instances) > 1) and (pattern_count < parameters.limit) and
+            len(pattern.definition.edges) + 1 <= parameters.maxSize)
 
 
-def get_initial_patterns(parameters, graph):
+def get_initial_patterns(parameters, graph, edge_pattern_table=None):
     """
-    Returns list of single-edge, evaluated patterns in given graph with more than one instance.
+    Returns list of single-edge, evaluated patterns in given graph with more than one instance, taken from the given
+    Pattern.EdgePatternTable of the graph if there is one.
     """
 
-    # Save input graph
-    input_graph = graph
-
-    # Save all found single-edge patterns in the current graph
-    initial_patterns = []
-
-    # Create a graph and an instance for each edge
-    edge_graph_instance_pairs = []
-
-    #
-    for edge in graph.edges.values():
-        graph = Graph.CreateGraphFromEdge(edge)
-
-        if parameters.temporal:
-            graph.TemporalOrder()
-
-        instance1 = Pattern.CreateInstanceFromEdge(edge)
-        edge_graph_instance_pairs.append((graph,instance1))
-
-    while edge_graph_instance_pairs:
-        edgePair1 = edge_graph_instance_pairs.pop(0)
-        graph = edgePair1[0]
-        instance1 = edgePair1[1]
-        pattern = Pattern.Pattern()
-        pattern.definition = graph
-        pattern.instances.append(instance1)
-        nonmatchingEdgePairs = []
-        for edgePair2 in edge_graph_instance_pairs:
-            graph2 = edgePair2[0]
-            instance2 = edgePair2[1]
-            if Graph.GraphMatch(graph, graph2) and (not Pattern.InstancesOverlap(parameters.overlap, pattern.instances, instance2)):
-                pattern.instances.append(instance2)
-            else:
-                nonmatchingEdgePairs.append(edgePair2)
-        if len(pattern.instances) > 1:
-            pattern.evaluate(input_graph, parameters.eval, parameters.overlap)
-            initial_patterns.append(pattern)
-        edge_graph_instance_pairs = nonmatchingEdgePairs
+    # The edges are bucketed by the code of their one-edge graph. Edges in the same bucket match, so a bucket is only
+    # split further by the overlap constraint, and no GraphMatch is needed
+    if edge_pattern_table is None:
+        edge_pattern_table = Pattern.EdgePatternTable(parameters, graph)
+    initial_patterns = edge_pattern_table.patterns()
+    Pattern.EvaluatePatterns(initial_patterns, graph, parameters.eval, parameters.overlap)
     return initial_patterns
 
 
@@ -471,6 +565,8 @@ def nx_subdue(
     :param prune: (Default: False)            -- Remove any patterns that are worse than their parent.
     :param valueBased: (Default: False)       -- Retain all patterns with the top beam best values.
     :param temporal: (Default: False)         -- Discover static (False) or temporal (True) patterns
+    :param timeLimit: (Default: 0)            -- Seconds after which discovery returns the best patterns so far; 0 is no limit
+    :param memoryLimit: (Default: 0)          -- Megabytes in use after which discovery does the same; 0 is no limit
 
     :return: list of patterns, where each pattern is a list of pattern instances, with an instance being a dictionary
     containing 
@@ -4,6 +4,7 @@
 #
 # Copyright (c) 2017-2021. Washington State University.
 
+import json
 
 # The Graph class allows the representation of an attributed, mixed multi-graph with time stamps on nodes
 # and edges. A graph has an id and a className (for now, either "positive" or "negative"). Each node has
@@ -404,6 +405,60 @@ def MatchVertex(graph1, graph2, vertexId1, vertexId2):
     return True
 
 
+# ----- Canonical codes
+
+def EdgeCode(edge, temporal=False):
+    """Returns a hashable code for the one-edge graph CreateGraphFromEdge(edge) would build (temporally ordered if
+    temporal is True), without building that graph. Two such one-edge graphs have equal codes when they match, and
+    match when their codes are equal, up to the JSON text comparison of unhashable attribute values (see AttributesKey)."""
+    sourceTemporal = targetTemporal = edgeTemporal = 0
+    if temporal:
+        timestamps = sorted(set([edge.source.timestamp, edge.target.timestamp, edge.timestamp]))
+        sourceTemporal = timestamps.index(edge.source.timestamp)
+        targetTemporal = timestamps.index(edge.target.timestamp)
+        edgeTemporal = timestamps.index(edge.timestamp)
+    # Both end points are new vertices of degree one in the one-edge graph, even for a self-loop
+    source = (AttributesKey(edge.source.attributes), 1, sourceTemporal)
+    target = (AttributesKey(edge.target.attributes), 1, targetTemporal)
+    if edge.directed:
+        endpoints = (source, target)
+    else:
+        endpoints = frozenset((source, target))  # a set of at most two keys identifies the unordered pair
+    return (AttributesKey(edge.attributes), edge.directed, edgeTemporal, endpoints)
+
+
+def GraphKey(graph):
+    """Returns a hashable key for the given graph. Graphs that GraphMatch matches have equal keys, since an edge mapping
+    preserves the attributes, direction and temporal order of each edge and the attributes, degree and temporal order
+    of its end points."""
+    vertexKeys = {}
+    for vertexId, vertex in graph.vertices.items():
+        vertexKeys[vertexId] = (AttributesKey(vertex.attributes), len(vertex.edges), vertex.temporal)
+    edgeKeys = {}
+    for edge in graph.edges.values():
+        endpoints = (vertexKeys[edge.source.id], vertexKeys[edge.target.id])
+        if not edge.directed:
+            endpoints = frozenset(endpoints)
+        edgeKey = (AttributesKey(edge.attributes), edge.directed, edge.temporal, endpoints)
+        edgeKeys[edgeKey] = edgeKeys.get(edgeKey, 0) + 1
+    vertexCounts = {}
+    for vertexKey in vertexKeys.values():
+        vertexCounts[vertexKey] = vertexCounts.get(vertexKey, 0) + 1
+    return (frozenset(vertexCounts.items()), frozenset(edgeKeys.items()))
+
+
+def AttributesKey(attributes):
+    """Returns a hashable key for the given attribute dictionary. Equal dictionaries yield equal keys, and
+    dictionaries with equal keys are equal. Dictionaries with unhashable values, e.g. lists from networkx, are keyed
+    on their JSON text instead, so values are compared by their JSON text there."""
+    key = tuple(sorted(attributes.items()))
+    try:
+        hash(key)
+    except TypeError:
+        key = json.dumps(attributes, sort_keys=True, default=repr)
+    return key
+
+
 # ----- Graph Creation
 
 def CreateGraphFromEdge(edge):
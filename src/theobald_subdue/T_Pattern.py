@@ -4,6 +4,8 @@
 #
 # Copyright (c) 2017-2021. Washington State University.
 
+import bisect
+
 from theobald_subdue.T_OrderedSet import OrderedSet
 import theobald_subdue.T_Graph as Graph
 
@@ -196,15 +198,97 @@ def InstanceOverlap(overlap, instance1, instance2):
         return instance1.vertices.intersect(instance2.vertices)
 
 
+def GroupInstances(overlap, instances):
+    """Split given list of matching instances into groups the way the pairwise loops do: the first group collects,
+    in order, each instance that does not overlap the group so far, the second group does the same with the instances
+    left over, and so on. Returns the groups as lists of indices into instances."""
+    groups = []
+    groupElements = []
+    for index, instance in enumerate(instances):
+        if overlap == "edge":
+            elements = [(frozenset(instance.vertices.set_container), frozenset(instance.edges.set_container))]
+        elif overlap == "vertex":
+            elements = instance.edges.set_container
+        else:  # overlap == "none"
+            elements = instance.vertices.set_container
+        for group, usedElements in zip(groups, groupElements):
+            if usedElements.isdisjoint(elements):
+                group.append(index)
+                usedElements.update(elements)
+                break
+        else:
+            groups.append([index])
+            groupElements.append(set(elements))
+    return groups
+
+
 # ----- Pattern List Operations
 
+class PatternList:
+    """List of patterns in decreasing order by value, as kept by PatternListInsert. Besides the patterns, it keeps
+    their negated values in increasing order for bisection, the patterns by graph key of their definition (see
+    Graph.GraphKey), since only patterns with the same key can match, and the number of patterns with each value."""
+
+    def __init__(self, patterns=()):
+        self.patterns = []
+        self.keys = []
+        self.buckets = {}
+        self.valueCounts = {}
+        for pattern in patterns:
+            self.add(pattern)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+    def __getitem__(self, index):
+        return self.patterns[index]
+
+    def add(self, pattern):
+        """Insert pattern after the patterns with the same or higher value."""
+        index = bisect.bisect_right(self.keys, -pattern.value)
+        self.patterns.insert(index, pattern)
+        self.keys.insert(index, -pattern.value)
+        # Keep each bucket in list order too, so that PatternListInsert matches against its patterns in that order
+        bucket = self.buckets.setdefault(Graph.GraphKey(pattern.definition), [])
+        bucketIndex = len(bucket)
+        while (bucketIndex > 0) and (bucket[bucketIndex - 1].value < pattern.value):
+            bucketIndex -= 1
+        bucket.insert(bucketIndex, pattern)
+        self.valueCounts[pattern.value] = self.valueCounts.get(pattern.value, 0) + 1
+
+    def remove(self, pattern):
+        index = bisect.bisect_left(self.keys, -pattern.value)
+        while self.patterns[index] is not pattern:
+            index += 1
+        self.pop(index)
+
+    def pop(self, index=-1):
+        pattern = self.patterns.pop(index)
+        self.keys.pop(index)
+        graphKey = Graph.GraphKey(pattern.definition)
+        self.buckets[graphKey].remove(pattern)
+        if not self.buckets[graphKey]:
+            del self.buckets[graphKey]
+        self.valueCounts[pattern.value] -= 1
+        if self.valueCounts[pattern.value] == 0:
+            del self.valueCounts[pattern.value]
+        return pattern
+
+    def matching_patterns(self, pattern):
+        """Returns the patterns on the list that may match the given pattern, in list order."""
+        return self.buckets.get(Graph.GraphKey(pattern.definition), [])
+
+
 def PatternListInsert(newPattern, patternList, maxLength, valueBased=False):
-    """Insert newPattern into patternList. If newPattern is isomorphic to an existing pattern on patternList, then keep higher-valued
+    """Insert newPattern into patternList, a PatternList. If newPattern is isomorphic to an existing pattern on patternList, then keep higher-valued
        pattern. The list is kept in decreasing order by pattern value. If valueBased=True, then maxLength represents the maximum number
        of different-valued patterns on the list; otherwise, maxLength represents the maximum number of patterns on the list.
        Assumes given patternList already conforms to maximums."""
     # Check if newPattern unique (i.e., non-isomorphic or isomorphic but better-valued)
-    for pattern in patternList:
+    for pattern in patternList.matching_patterns(newPattern):
         if (Graph.GraphMatch(pattern.definition, newPattern.definition)):
             if (pattern.value >= newPattern.value):
                 return  # newPattern already on list with same or better value
@@ -213,17 +297,11 @@ def PatternListInsert(newPattern, patternList, maxLength, valueBased=False):
                 patternList.remove(pattern)
                 break
     # newPattern unique, so insert in order by value
-    insertAtIndex = 0
-    for pattern in patternList:
-        if newPattern.value > pattern.value:
-            break
-        insertAtIndex += 1
-    patternList.insert(insertAtIndex, newPattern)
+    patternList.add(newPattern)
     # check if patternList needs to be trimmed
     if valueBased:
-        uniqueValues = UniqueValues(patternList)
-        if len(uniqueValues) > maxLength:
-            removeValue = uniqueValues[-1]
+        if len(patternList.valueCounts) > maxLength:
+            removeValue = patternList[-1].value
             while (patternList[-1].value == removeValue):
                 patternList.pop(-1)
     else:
@@ -234,7 +312,9 @@ def PatternListInsert(newPattern, patternList, maxLength, valueBased=False):
 def UniqueValues(patternList):
     """Returns list of unique values of patterns in given pattern list, in same order."""
     uniqueValues = []
+    seenValues = set()
     for pattern in patternList:
-        if pattern.value not in uniqueValues:
+        if pattern.value not in seenValues:
+            seenValues.add(pattern.value)
             uniqueValues.append(pattern.value)
     return uniqueValues
@@ -28,11 +28,11 @@ def substructure_discovery(parameters, graph):
     parent_patterns = get_initial_patterns(parameters, graph)
 
     # Store best patterns
-    discovered_patterns = []
+    discovered_patterns = Pattern.PatternList()
 
     # Start another loop if parent patterns are available and the limit has not been reached. Reset child patterns.
     while (pattern_count < parameters.limit) and parent_patterns:
-        child_patterns = []
+        child_patterns = Pattern.PatternList()
 
         # Discover patterns for each parent pattern
         while parent_patterns:
@@ -72,7 +72,7 @@ def substructure_discovery(parameters, graph):
         parent_pattern = parent_patterns.pop(0)
         if len(parent_pattern.definition.edges) >= parameters.minSize:
             Pattern.PatternListInsert(parent_pattern, discovered_patterns, parameters.numBest)
-    return discovered_patterns
+    return list(discovered_patterns)
 
 
 def get_initial_patterns(parameters, graph):
@@ -80,41 +80,33 @@ def get_initial_patterns(parameters, graph):
     Returns list of single-edge, evaluated patterns in given graph with more than one instance.
     """
     initialPatternList = []
-    # Create a graph and an instance for each edge
-    edgeGraphInstancePairs = []
 
-    for edge in graph.edges.values():
-        graph1 = Graph.CreateGraphFromEdge(edge)
-
-        if parameters.temporal:
-            graph1.TemporalOrder()
-
-        instance1 = Pattern.CreateInstanceFromEdge(edge)
-        edgeGraphInstancePairs.append((graph1, instance1))
-
-    while edgeGraphInstancePairs:
-        edgePair1 = edgeGraphInstancePairs.pop(0)
-        graph1 = edgePair1[0]
-        instance1 = edgePair1[1]
-        pattern = Pattern.Pattern()
-        pattern.definition = graph1
-        pattern.instances.append(instance1)
-        nonmatchingEdgePairs = []
-
-        for edgePair2 in edgeGraphInstancePairs:
-            graph2 = edgePair2[0]
-            instance2 = edgePair2[1]
-
-            if Graph.GraphMatch(graph1, graph2) and (not Pattern.InstancesOverlap(parameters.overlap, pattern.instances, instance2)):
-                pattern.instances.append(instance2)
-            else:
-                nonmatchingEdgePairs.append(edgePair2)
-
-        if len(pattern.instances) > 1:
-            pattern.evaluate(graph)
-            initialPatternList.append(pattern)
-
-        edgeGraphInstancePairs = nonmatchingEdgePairs
+    # Bucket the edges by the code of their one-edge graph. Edges in the same bucket match, so a bucket is only split
+    # further by the overlap constraint
+    buckets = {}
+    for edgeIndex, edge in enumerate(graph.edges.values()):
+        code = Graph.EdgeCode(edge, parameters.temporal)
+        buckets.setdefault(code, []).append((edgeIndex, edge))
+
+    indexedPatterns = []
+    for bucket in buckets.values():
+        instances = [Pattern.CreateInstanceFromEdge(edge) for edgeIndex, edge in bucket]
+        for group in Pattern.GroupInstances(parameters.overlap, instances):
+            if len(group) > 1:
+                edgeIndex, edge = bucket[group[0]]
+                graph1 = Graph.CreateGraphFromEdge(edge)
+                if parameters.temporal:
+                    graph1.TemporalOrder()
+                pattern = Pattern.Pattern()
+                pattern.definition = graph1
+                pattern.instances = [instances[index] for index in group]
+                indexedPatterns.append((edgeIndex, pattern))
+
+    # Keep the order of the edges the patterns were first found on
+    indexedPatterns.sort(key=lambda indexedPattern: indexedPattern[0])
+    for edgeIndex, pattern in indexedPatterns:
+        pattern.evaluate(graph)
+        initialPatternList.append(pattern)
 
     return initialPatternList
 
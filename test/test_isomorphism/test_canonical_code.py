@@ -0,0 +1,97 @@
+import itertools
+
+import subdue_python.Graph as Graph
+
+
+def build_graph(vertex_labels, edges):
+    """Build a Subdue graph from a list of vertex labels and (source, target, label, directed) edge tuples."""
+    json_graph = []
+    for vertex_id, label in enumerate(vertex_labels, start=1):
+        json_graph.append({'vertex': {'id': str(vertex_id), 'attributes': {'label': label}}})
+    for edge_id, (source, target, label, directed) in enumerate(edges, start=1):
+        json_graph.append({'edge': {'id': str(edge_id), 'source': str(source), 'target': str(target),
+                                    'directed': 'true' if directed else 'false', 'attributes': {'label': label}}})
+    graph = Graph.Graph()
+    graph.load_from_json(json_graph)
+    return graph
+
+
+GRAPHS = [
+    build_graph(['A', 'B', 'C'], [(1, 2, 'x', False), (2, 3, 'y', False)]),
+    build_graph(['C', 'B', 'A'], [(3, 2, 'x', False), (2, 1, 'y', False)]),
+    build_graph(['A', 'B', 'C'], [(2, 1, 'x', False), (3, 2, 'y', False)]),
+    build_graph(['A', 'B', 'C'], [(1, 2, 'x', True), (2, 3, 'y', False)]),
+    build_graph(['A', 'B', 'C'], [(2, 1, 'x', True), (2, 3, 'y', False)]),
+    build_graph(['A', 'B', 'C'], [(1, 2, 'y', False), (2, 3, 'x', False)]),
+    build_graph(['A', 'A', 'A'], [(1, 2, 'x', False), (2, 3, 'x', False), (3, 1, 'x', False)]),
+    build_graph(['A', 'A'], [(1, 2, 'x', False), (2, 1, 'x', False), (1, 1, 'x', False)]),
+    build_graph(['A', 'B'], [(1, 2, 'x', False), (1, 2, 'x', False)]),
+    build_graph(['A', 'B'], [(1, 2, 'x', False)]),
+]
+
+
+def test_canonical_code_agrees_with_graph_match():
+    for graph1, graph2 in itertools.product(GRAPHS, repeat=2):
+        same_code = Graph.CanonicalCode(graph1) == Graph.CanonicalCode(graph2)
+        assert same_code == Graph.GraphMatch_Orig(graph1, graph2)
+        assert same_code != Graph.InvariantsDiffer(graph1, graph2)
+
+
+def test_canonical_code_uses_temporal_order():
+    graph1 = build_graph(['A', 'B', 'C'], [(1, 2, 'x', False), (2, 3, 'x', False)])
+    graph2 = build_graph(['A', 'B', 'C'], [(1, 2, 'x', False), (2, 3, 'x', False)])
+    graph1.edges['2'].timestamp = 1
+    Graph.GetInvariants(graph1)
+    graph1.TemporalOrder()
+    graph2.TemporalOrder()
+    assert Graph.InvariantsDiffer(graph1, graph2)
+    assert Graph.CanonicalCode(graph1) != Graph.CanonicalCode(graph2)
+    assert not Graph.GraphMatch_Orig(graph1, graph2)
+
+
+def test_edge_code_matches_one_edge_graph_code():
+    for temporal in [False, True]:
+        for graph in GRAPHS:
+            for edge in graph.edges.values():
+                edge_graph = Graph.CreateGraphFromEdge(edge)
+                if temporal:
+                    edge_graph.TemporalOrder()
+                assert Graph.EdgeCode(edge, temporal) == Graph.CanonicalCode(edge_graph)
+
+
+def test_label_ids_intern_attributes():
+    assert Graph.LabelId({'label': 'A', 'x': 1}) == Graph.LabelId({'x': 1, 'label': 'A'})
+    assert Graph.LabelId({'label': 'A'}) != Graph.LabelId({'label': 'B'})
+    assert Graph.LabelId({'label': [1, 2]}) == Graph.LabelId({'label': [1, 2]})
+    assert Graph.LabelId({'label': [1, 2]}) != Graph.LabelId({'label': [2, 1]})
+    assert Graph.LabelId({}) == Graph.Vertex('1').labelId
+    graph = GRAPHS[0]
+    assert graph.vertices['1'].labelId == Graph.LabelId({'label': 'A'})
+    assert graph.vertices['1'].attributes == {'label': 'A'}
+
+
+def test_label_ids_follow_attributes():
+    # Adding attributes one at a time interns only the complete dictionary
+    num_label_ids = len(Graph.gLabelIds)
+    vertex = Graph.Vertex('1')
+    for key in ['label', 'x', 'y', 'z']:
+        vertex.add_attribute(key, 'unseen')
+    assert len(Graph.gLabelIds) == num_label_ids
+    assert vertex.labelId == Graph.LabelId({'label': 'unseen', 'x': 'unseen', 'y': 'unseen', 'z': 'unseen'})
+    assert len(Graph.gLabelIds) == num_label_ids + 1
+    # Assigning attributes directly changes the label id too
+    edge = Graph.Edge('1', vertex, vertex)
+    assert edge.labelId == Graph.LabelId({})
+    edge.attributes = {'label': 'B'}
+    assert edge.labelId == Graph.LabelId({'label': 'B'})
+    assert Graph.JsonAttributes(edge, {}) == '{"label": "B"}'
+    vertex.attributes = {'label': 'A'}
+    assert vertex.labelId == GRAPHS[0].vertices['1'].labelId
+
+
+if __name__ == "__main__":
+    test_canonical_code_agrees_with_graph_match()
+    test_canonical_code_uses_temporal_order()
+    test_edge_code_matches_one_edge_graph_code()
+    test_label_ids_intern_attributes()
+    test_label_ids_follow_attributes()
@@ -0,0 +1,105 @@
+import itertools
+from collections import Counter
+
+import subdue_python.Graph as Graph
+from test_canonical_code import GRAPHS, build_graph
+
+
+def brute_force_isomorphic(graph1, graph2):
+    """Try every vertex mapping from graph1 to graph2."""
+    if (len(graph1.vertices) != len(graph2.vertices)) or (len(graph1.edges) != len(graph2.edges)):
+        return False
+    vertex_ids1 = list(graph1.vertices.keys())
+    edges2 = Counter(edge_key(edge, edge.source.id, edge.target.id) for edge in graph2.edges.values())
+    for vertex_ids2 in itertools.permutations(graph2.vertices.keys()):
+        mapping = dict(zip(vertex_ids1, vertex_ids2))
+        if any(graph1.vertices[v1].attributes != graph2.vertices[v2].attributes for v1, v2 in mapping.items()):
+            continue
+        edges1 = Counter(edge_key(edge, mapping[edge.source.id], mapping[edge.target.id])
+                         for edge in graph1.edges.values())
+        if edges1 == edges2:
+            return True
+    return False
+
+
+def edge_key(edge, source_id, target_id):
+    endpoints = (source_id, target_id) if edge.directed else frozenset((source_id, target_id))
+    return tuple(sorted(edge.attributes.items())), edge.directed, endpoints
+
+
+def test_vf2_agrees_with_brute_force():
+    for graph1, graph2 in itertools.product(GRAPHS, repeat=2):
+        assert Graph.GraphMatch_VF2(graph1, graph2) == brute_force_isomorphic(graph1, graph2)
+
+
+def test_vf2_keeps_vertex_mapping_consistent():
+    # A 6-cycle and two triangles have the same edges and degrees, so GraphMatch cannot tell them apart
+    hexagon = build_graph(['A'] * 6, [(1, 2, 'x', False), (2, 3, 'x', False), (3, 4, 'x', False),
+                                      (4, 5, 'x', False), (5, 6, 'x', False), (6, 1, 'x', False)])
+    triangles = build_graph(['A'] * 6, [(1, 2, 'x', False), (2, 3, 'x', False), (3, 1, 'x', False),
+                                        (4, 5, 'x', False), (5, 6, 'x', False), (6, 4, 'x', False)])
+    assert Graph.GraphMatch(hexagon, triangles)
+    assert not Graph.GraphMatch_VF2(hexagon, triangles)
+    assert Graph.GraphMatch_VF2(hexagon, hexagon)
+
+
+def test_set_matcher():
+    cycle = build_graph(['A'] * 4, [(1, 2, 'x', True), (2, 3, 'x', True), (3, 4, 'x', True), (4, 1, 'x', True)])
+    two_cycles = build_graph(['A'] * 4, [(1, 2, 'x', True), (2, 1, 'x', True), (3, 4, 'x', True), (4, 3, 'x', True)])
+    try:
+        Graph.SetMatcher("vf2")
+        assert not Graph.Match(cycle, two_cycles)
+        Graph.SetMatcher("subdue")
+        assert Graph.Match(cycle, two_cycles)
+    finally:
+        Graph.SetMatcher("subdue")
+
+
+def test_isomorphism_modes_agree():
+    try:
+        for matcher in ["subdue", "vf2"]:
+            for isomorphism in ["bounded", "exact", "adaptive"]:
+                Graph.SetMatcher(matcher, isomorphism)
+                Graph.ResetMatchStatistics()
+                for graph1, graph2 in itertools.product(GRAPHS, repeat=2):
+                    exact = Graph.GraphMatch_Orig(graph1, graph2) if matcher == "subdue" else brute_force_isomorphic(graph1, graph2)
+                    assert Graph.Match(graph1, graph2) == exact
+                # Graphs that pass the invariants are matched by GraphMatch without backtracking
+                assert (matcher != "subdue") or (Graph.gMatchStatistics["boundHits"] == 0)
+    finally:
+        Graph.SetMatcher("subdue")
+
+
+def test_match_cache():
+    def hexagon():
+        return build_graph(['A'] * 6, [(1, 2, 'x', False), (2, 3, 'x', False), (3, 4, 'x', False),
+                                       (4, 5, 'x', False), (5, 6, 'x', False), (6, 1, 'x', False)])
+    triangles = build_graph(['A'] * 6, [(1, 2, 'x', False), (2, 3, 'x', False), (3, 1, 'x', False),
+                                        (4, 5, 'x', False), (5, 6, 'x', False), (6, 4, 'x', False)])
+    assert Graph.Fingerprint(hexagon()) == Graph.Fingerprint(hexagon())
+    assert Graph.Fingerprint(hexagon()) != Graph.Fingerprint(triangles)
+    try:
+        Graph.SetMatcher("vf2", cacheSize=2)
+        Graph.ResetMatchStatistics()
+        assert Graph.Match(hexagon(), hexagon())
+        assert not Graph.Match(hexagon(), triangles)
+        # Equal fingerprints, so answered from the cache
+        assert Graph.Match(hexagon(), hexagon())
+        assert not Graph.Match(hexagon(), triangles)
+        assert (Graph.gMatchStatistics["cacheHits"], Graph.gMatchStatistics["cacheMisses"]) == (2, 2)
+        Graph.Match(triangles, hexagon())
+        assert len(Graph.gMatchCache) == 2
+        Graph.SetMatcher("vf2", cacheSize=0)
+        Graph.ResetMatchStatistics()
+        assert Graph.Match(hexagon(), hexagon())
+        assert Graph.gMatchStatistics["cacheHits"] == 0 and not Graph.gMatchCache
+    finally:
+        Graph.SetMatcher("subdue")
+
+
+if __name__ == "__main__":
+    test_vf2_agrees_with_brute_force()
+    test_vf2_keeps_vertex_mapping_consistent()
+    test_set_matcher()
+    test_isomorphism_modes_agree()
+    test_match_cache()
@@ -0,0 +1,49 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+from subdue_python import Subdue, Parameters
+
+
+def beam_search_graph_file(experiment):
+    """Returns the path of the input graph of the given experiment in test_subdue_beam_search."""
+    return os.path.join(os.path.dirname(__file__), '..', 'test_subdue_beam_search', experiment,
+                        'connected_components.json')
+
+
+def load(graph_class, graph_file):
+    with open(graph_file) as input_graph_file:
+        graph = graph_class()
+        graph.load_from_json(json.load(input_graph_file))
+    return graph
+
+
+def summary(graph):
+    """Returns the vertices and edges of the given Graph or CompactGraph, for comparing graphs."""
+    return ([(vertex.id, vertex.timestamp, vertex.temporal, vertex.attributes, vertex.labelId,
+              [edge.id for edge in vertex.edges]) for vertex in graph.vertices.values()],
+            [(edge.id, edge.source.id, edge.target.id, edge.directed, edge.timestamp, edge.temporal, edge.attributes,
+              edge.labelId) for edge in graph.edges.values()])
+
+
+def pattern_summary(patterns):
+    """Returns the value and the edges of the instances of each given pattern, for comparing discovered patterns."""
+    return [(pattern.value, [[edge.id for edge in instance.edges] for instance in pattern.instances])
+            for pattern in patterns]
+
+
+def run_subdue(graph, workers=1, **kwargs):
+    """Runs Subdue on the given graph with a small beam and the given parameters, without output, and returns the
+    pattern summary of each iteration."""
+    parameters = Parameters.Parameters()
+    settings = dict(beamWidth=4, limit=20, maxSize=5, numBest=3)
+    settings.update(kwargs)
+    parameters.set_parameters_from_kwargs(**settings)
+    parameters.set_defaults_for_graph(graph)
+    parameters.workers = workers
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        parameters.outputFileName = os.path.join(output_dir, 'graph')
+        iterations = Subdue.subdue(parameters, graph)
+    return [pattern_summary(patterns) for patterns in iterations]
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import tempfile
+
+import subdue_python.Parallel as Parallel
+import subdue_python.Pattern as Pattern
+from subdue_python import Subdue, Parameters
+from graph_helpers import beam_search_graph_file, pattern_summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo17_p0,5')
+
+
+class CountingBudget:
+    """A budget that runs out after the given number of checks."""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    def exhausted(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def create_parameters(graph, workers=1, **kwargs):
+    parameters = Parameters.Parameters()
+    parameters.set_parameters_from_kwargs(beamWidth=4, limit=20, maxSize=5, numBest=3, **kwargs)
+    parameters.set_defaults_for_graph(graph)
+    parameters.workers = workers
+    return parameters
+
+
+def discover(budget=None, workers=1, **kwargs):
+    graph = Subdue.read_graph(graph_file)
+    parameters = create_parameters(graph, workers, **kwargs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Subdue.substructure_discover(parameters, graph, budget=budget)
+
+
+def test_unlimited_budget():
+    expected = discover()
+    assert not expected.truncated
+    assert pattern_summary(discover(timeLimit=3600, memoryLimit=1e6)) == pattern_summary(expected)
+    assert pattern_summary(discover(CountingBudget(10 ** 6))) == pattern_summary(expected)
+
+
+def test_exhausted_budget():
+    expected = discover()
+    for patterns in [discover(timeLimit=1e-9), discover(memoryLimit=1e-6), discover(CountingBudget(0))]:
+        # Nothing was extended, so the best one-edge patterns are discovered
+        assert patterns.truncated
+        assert 0 < len(patterns) <= 3
+        assert all(len(pattern.definition.edges) == 1 for pattern in patterns)
+    for checks in [1, 5, 20]:
+        patterns = discover(CountingBudget(checks))
+        assert patterns.truncated
+        values = [pattern.value for pattern in patterns]
+        assert values == sorted(values, reverse=True)
+        assert values[0] <= expected[0].value
+
+
+def test_exhausted_budget_in_workers():
+    graph = Subdue.read_graph(graph_file)
+    parameters = create_parameters(graph, workers=2)
+    parents = Subdue.get_initial_patterns(parameters, graph)
+    expansion_pool = Parallel.ExpansionPool(parameters, graph)
+    try:
+        # The budget is checked as each task is done, and runs out when the third one is
+        pattern_lists = expansion_pool.extend(parents, CountingBudget(2))
+    finally:
+        expansion_pool.close()
+    finished = [index for index, pattern_list in enumerate(pattern_lists) if pattern_list is not None]
+    assert len(finished) == 3 < len(parents)
+    for index in finished:
+        expected = Pattern.ExtendPattern(parameters, parents[index])
+        Pattern.EvaluatePatterns(expected, graph, parameters.eval, parameters.overlap)
+        assert pattern_summary(pattern_lists[index]) == pattern_summary(expected)
+    # Discovery keeps the extensions of the parents finished before the budget ran out
+    initial_patterns = discover(CountingBudget(0))
+    patterns = discover(CountingBudget(3), workers=2)
+    assert patterns.truncated
+    values = [pattern.value for pattern in patterns]
+    assert values == sorted(values, reverse=True)
+    assert any(len(pattern.definition.edges) > 1 for pattern in patterns)
+    assert values[0] >= initial_patterns[0].value
+    assert pattern_summary(discover(CountingBudget(10 ** 6), workers=2)) == pattern_summary(discover())
+
+
+def test_subdue_stops_iterating():
+    graph = Subdue.read_graph(graph_file)
+    parameters = Parameters.Parameters()
+    parameters.set_parameters_from_kwargs(beamWidth=4, limit=20, maxSize=5, numBest=3, iterations=3, timeLimit=1e-9)
+    parameters.set_defaults_for_graph(graph)
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        parameters.outputFileName = os.path.join(output_dir, 'graph')
+        iterations = Subdue.subdue(parameters, graph)
+    assert len(iterations) == 1 and iterations[0].truncated
+
+
+if __name__ == "__main__":
+    test_unlimited_budget()
+    test_exhausted_budget()
+    test_exhausted_budget_in_workers()
+    test_subdue_stops_iterating()
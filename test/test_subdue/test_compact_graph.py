@@ -0,0 +1,28 @@
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Graph as Graph
+from graph_helpers import beam_search_graph_file, load, run_subdue, summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo1_p0,5')
+
+settings = dict(beamWidth=3, limit=10, maxSize=5, numBest=2, iterations=2)
+
+
+def test_compact_graph_matches_graph():
+    graph = load(Graph.Graph, graph_file)
+    compact_graph = load(CompactGraph.CompactGraph, graph_file)
+    assert summary(compact_graph) == summary(graph)
+    assert summary(compact_graph.to_graph()) == summary(graph)
+    assert summary(CompactGraph.CreateCompactGraphFromGraph(graph)) == summary(graph)
+
+
+def test_compact_graph_discovery_and_compress():
+    graph = load(Graph.Graph, graph_file)
+    compact_graph = load(CompactGraph.CompactGraph, graph_file)
+    assert run_subdue(compact_graph, **settings) == run_subdue(graph, **settings)
+    # Both graphs were compressed by the best pattern of the first iteration
+    assert summary(compact_graph) == summary(graph)
+
+
+if __name__ == "__main__":
+    test_compact_graph_matches_graph()
+    test_compact_graph_discovery_and_compress()
@@ -0,0 +1,70 @@
+import contextlib
+import io
+
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Graph as Graph
+from subdue_python import Subdue, Parameters
+from graph_helpers import beam_search_graph_file, load, summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo1_p0,5')
+
+
+def compress_list_based(graph, iteration, pattern):
+    """Graph.Compress removing each instance edge from its end points' edge lists, and checking each reconnected edge
+    against the new vertex's edge list."""
+    instanceNum = 0
+    for instance in pattern.instances:
+        instanceNum += 1
+        newVertex = Graph.Vertex('PATTERN-' + str(iteration) + '-' + str(instanceNum))
+        newVertex.timestamp = instance.max_timestamp()
+        newVertex.add_attribute('label', 'PATTERN-' + str(iteration))
+        graph.vertices[newVertex.id] = newVertex
+        for instanceEdge in instance.edges:
+            instanceEdge.source.edges.remove(instanceEdge)
+            instanceEdge.target.edges.remove(instanceEdge)
+            del graph.edges[instanceEdge.id]
+        for instanceVertex in instance.vertices:
+            for edge in instanceVertex.edges:
+                if edge.source == instanceVertex:
+                    edge.source = newVertex
+                if edge.target == instanceVertex:
+                    edge.target = newVertex
+                if edge not in newVertex.edges:
+                    newVertex.edges.append(edge)
+            del graph.vertices[instanceVertex.id]
+
+
+def best_pattern(graph):
+    parameters = Parameters.Parameters()
+    parameters.set_parameters_from_kwargs(beamWidth=3, limit=10, maxSize=3, numBest=1)
+    parameters.set_defaults_for_graph(graph)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Subdue.substructure_discover(parameters, graph)[0]
+
+
+def test_compress_matches_list_based():
+    expected_graph = load(Graph.Graph, graph_file)
+    compress_list_based(expected_graph, 1, best_pattern(expected_graph))
+    graph = load(Graph.Graph, graph_file)
+    original = summary(graph)
+    pattern = best_pattern(graph)
+    changes = graph.Compress(1, pattern)
+    assert summary(graph) == summary(expected_graph)
+    # The change set accounts for every vertex and edge that was removed, added, or reconnected
+    original_vertices = set(vertex[0] for vertex in original[0])
+    original_edges = {edge[0]: (edge[1], edge[2]) for edge in original[1]}
+    assert changes.removedVertices == [vertex.id for instance in pattern.instances for vertex in instance.vertices]
+    assert changes.removedEdges == [edge.id for instance in pattern.instances for edge in instance.edges]
+    assert set(graph.vertices) == (original_vertices - set(changes.removedVertices)) | set(changes.newVertices)
+    assert set(graph.edges) == set(original_edges) - set(changes.removedEdges)
+    assert set(changes.rewiredEdges) == set(edge.id for edge in graph.edges.values()
+                                            if (edge.source.id, edge.target.id) != original_edges[edge.id])
+    assert len(changes.rewiredEdges) == len(set(changes.rewiredEdges)) > 0
+    compact_graph = load(CompactGraph.CompactGraph, graph_file)
+    compact_changes = compact_graph.Compress(1, best_pattern(compact_graph))
+    assert summary(compact_graph) == summary(graph)
+    assert vars(compact_changes) == vars(changes)
+
+
+if __name__ == "__main__":
+    test_compress_matches_list_based()
@@ -0,0 +1,40 @@
+import contextlib
+import io
+
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+from subdue_python import Subdue, Parameters
+from graph_helpers import beam_search_graph_file, load
+
+graph_file = beam_search_graph_file('SingleEO_10_eo1_p0,5')
+
+
+def summary(patterns):
+    return [(Graph.CanonicalCode(pattern.definition), pattern.value,
+             [[edge.id for edge in instance.edges] for instance in pattern.instances]) for pattern in patterns]
+
+
+def test_updated_table_matches_new_table():
+    for graph_class in [Graph.Graph, CompactGraph.CompactGraph]:
+        for temporal in [False, True]:
+            graph = load(graph_class, graph_file)
+            parameters = Parameters.Parameters()
+            parameters.set_parameters_from_kwargs(beamWidth=3, limit=10, maxSize=3, numBest=1, temporal=temporal)
+            parameters.set_defaults_for_graph(graph)
+            table = Pattern.EdgePatternTable(parameters, graph)
+            iteration = 1
+            while graph.edges:
+                patterns = Subdue.get_initial_patterns(parameters, graph, table)
+                assert summary(patterns) == summary(Subdue.get_initial_patterns(parameters, graph))
+                if not patterns:
+                    break
+                with contextlib.redirect_stdout(io.StringIO()):
+                    best_pattern = Subdue.substructure_discover(parameters, graph, table)[0]
+                table.update(graph.Compress(iteration, best_pattern))
+                iteration += 1
+            assert iteration > 3
+
+
+if __name__ == "__main__":
+    test_updated_table_matches_new_table()
@@ -0,0 +1,56 @@
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+from subdue_python import Subdue, Parameters
+from graph_helpers import beam_search_graph_file, load
+from test_extend_pattern import build_graph
+
+graph_file = beam_search_graph_file('SingleEO_10_eo97_p0,5')
+
+
+def extended_patterns(graph, overlap):
+    parameters = Parameters.Parameters()
+    parameters.overlap = overlap
+    patterns = Subdue.get_initial_patterns(parameters, graph)
+    return patterns + [new_pattern for pattern in patterns for new_pattern in Pattern.ExtendPattern(parameters, pattern)]
+
+
+def test_evaluate_patterns_matches_evaluate():
+    for graph_class in [Graph.Graph, CompactGraph.CompactGraph]:
+        graph = load(graph_class, graph_file)
+        for overlap in ["none", "vertex", "edge"]:
+            patterns = extended_patterns(graph, overlap)
+            for eval in [1, 2, 3, 4]:
+                Pattern.EvaluatePatterns(patterns, graph, eval, overlap)
+                values = [pattern.value for pattern in patterns]
+                for pattern in patterns:
+                    pattern.evaluate(graph, eval, overlap)
+                assert values == [pattern.value for pattern in patterns]
+
+
+def test_overlap_counts():
+    graph = build_graph(0)
+    parameters = Parameters.Parameters()
+    parameters.overlap = "edge"
+    patterns = Subdue.get_initial_patterns(parameters, graph)
+    for _ in range(2):
+        patterns = [new_pattern for pattern in patterns for new_pattern in Pattern.ExtendPattern(parameters, pattern)]
+    num_overlapping = 0
+    for pattern in patterns:
+        instances = list(pattern.instances)
+        shared_vertices = shared_edges = edge_pairs = 0
+        for index, instance in enumerate(instances):
+            earlier = instances[:index]
+            shared_vertices += sum(any(vertex in other.vertices for other in earlier) for vertex in instance.vertices)
+            shared_edges += sum(any(edge in other.edges for other in earlier) for edge in instance.edges)
+            edge_pairs += sum(len(instance.edges.intersection(other.edges)) for other in earlier)
+        assert Pattern.OverlapCounts(instances) == (shared_vertices, shared_edges)
+        assert pattern.calc_overlap_edges() == edge_pairs
+        assert pattern.instances == instances
+        num_overlapping += shared_edges > 0
+    assert num_overlapping > 0
+
+
+if __name__ == "__main__":
+    test_evaluate_patterns_matches_evaluate()
+    test_overlap_counts()
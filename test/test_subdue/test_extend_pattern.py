@@ -0,0 +1,150 @@
+import itertools
+from random import Random
+
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+from subdue_python import Subdue, Parameters
+
+
+def build_graph(seed):
+    """A random graph with few labels, mixed directed and undirected edges, self-loops and parallel edges, so that
+    extensions of aligned instances meet automorphisms and differently oriented but matching edges."""
+    random = Random(seed)
+    json_graph = []
+    for vertex_id in range(1, 16):
+        json_graph.append({'vertex': {'id': str(vertex_id), 'attributes': {'label': random.choice('AAB')}}})
+    for edge_id in range(1, 21):
+        json_graph.append({'edge': {'id': str(edge_id), 'source': str(random.randint(1, 15)),
+                                    'target': str(random.randint(1, 15)), 'directed': random.choice(['true', 'false']),
+                                    'attributes': {'label': random.choice('xxy')}}})
+    graph = Graph.Graph()
+    graph.load_from_json(json_graph)
+    return graph
+
+
+def extend_pattern_pairwise(parameters, pattern):
+    """ExtendPattern without grouping by extension: match every extended instance graph against the others."""
+    extended_instances = {}
+    for instance in pattern.instances:
+        for new_instance in Pattern.ExtendInstance(instance):
+            Pattern.InsertNewInstance(extended_instances, new_instance)
+    entries = [(instance, Pattern.CreateInstanceGraph(instance, parameters.temporal))
+               for instance in extended_instances.values()]
+    patterns = []
+    while entries:
+        instance, instance_graph = entries.pop(0)
+        matching_instances = [instance]
+        nonmatching_entries = []
+        for entry in entries:
+            if Graph.Match(instance_graph, entry[1]) and not Pattern.InstancesOverlap(parameters.overlap, matching_instances, entry[0]):
+                matching_instances.append(entry[0])
+            else:
+                nonmatching_entries.append(entry)
+        entries = nonmatching_entries
+        patterns.append(matching_instances)
+    return patterns
+
+
+def insert_new_instance_list_scan(instance_list, new_instance):
+    """InsertNewInstance on a list: compare the new instance with every instance on the list."""
+    if not any(Pattern.InstanceMatch(instance, new_instance) for instance in instance_list):
+        instance_list.append(new_instance)
+
+
+def instance_ids(instances):
+    return [sorted(edge.id for edge in instance.edges) for instance in instances]
+
+
+def test_extend_pattern_matches_pairwise_extension():
+    for seed, overlap, matcher in itertools.product(range(3), ["none", "vertex", "edge"], ["subdue", "vf2"]):
+        graph = build_graph(seed)
+        Graph.SetMatcher(matcher)
+        parameters = Parameters.Parameters()
+        parameters.overlap = overlap
+        patterns = Subdue.get_initial_patterns(parameters, graph)
+        for _ in range(3):
+            extended_patterns = []
+            for pattern in patterns:
+                expected = extend_pattern_pairwise(parameters, pattern)
+                actual = Pattern.ExtendPattern(parameters, pattern)
+                assert [instance_ids(new_pattern.instances) for new_pattern in actual] == \
+                       [instance_ids(instances) for instances in expected]
+                extended_patterns.extend(actual)
+            patterns = extended_patterns
+    Graph.SetMatcher("subdue")
+
+
+def test_instance_graphs_built_once():
+    create_graph_from_instance = Graph.CreateGraphFromInstance
+    built_instances = []
+    def counting_create_graph_from_instance(instance):
+        built_instances.append(instance)
+        return create_graph_from_instance(instance)
+    Graph.CreateGraphFromInstance = counting_create_graph_from_instance
+    try:
+        for seed, overlap, temporal in itertools.product(range(3), ["none", "vertex", "edge"], [False, True]):
+            graph = build_graph(seed)
+            parameters = Parameters.Parameters()
+            parameters.overlap = overlap
+            parameters.temporal = temporal
+            patterns = Subdue.get_initial_patterns(parameters, graph)
+            for _ in range(3):
+                extended_patterns = []
+                for pattern in patterns:
+                    del built_instances[:]
+                    new_patterns = Pattern.ExtendPattern(parameters, pattern)
+                    assert len(set(map(id, built_instances))) == len(built_instances)
+                    for new_pattern in new_patterns:
+                        assert all(instance.graph is None for instance in new_pattern.instances)
+                        expected = create_graph_from_instance(new_pattern.instances[0])
+                        if temporal:
+                            expected.TemporalOrder()
+                        assert Graph.CanonicalCode(new_pattern.definition) == Graph.CanonicalCode(expected)
+                    extended_patterns.extend(new_patterns)
+                patterns = extended_patterns
+    finally:
+        Graph.CreateGraphFromInstance = create_graph_from_instance
+
+
+def test_insert_new_instance_keeps_first_match():
+    graph = build_graph(0)
+    edge1, edge2, edge3 = list(graph.edges.values())[:3]
+    instance12 = Pattern.ExtendInstanceByEdge(Pattern.CreateInstanceFromEdge(edge1), edge2)
+    instance21 = Pattern.ExtendInstanceByEdge(Pattern.CreateInstanceFromEdge(edge2), edge1)
+    instance13 = Pattern.ExtendInstanceByEdge(Pattern.CreateInstanceFromEdge(edge1), edge3)
+    # The same edges, reached in a different order
+    assert list(instance12.edges) != list(instance21.edges)
+    assert Pattern.InstanceKey(instance12) == Pattern.InstanceKey(instance21)
+    assert Pattern.InstanceKey(instance12) != Pattern.InstanceKey(instance13)
+    instances = {}
+    for instance in [instance12, instance13, instance21, instance12, instance13]:
+        Pattern.InsertNewInstance(instances, instance)
+    assert list(instances.values()) == [instance12, instance13]
+
+
+def test_extend_instances_matches_list_scan():
+    num_duplicates = 0
+    for seed in range(3):
+        graph = build_graph(seed)
+        parameters = Parameters.Parameters()
+        instances = [instance for pattern in Subdue.get_initial_patterns(parameters, graph)
+                     for instance in pattern.instances]
+        for _ in range(3):
+            expected = []
+            new_instances = [new_instance for instance in instances for new_instance in Pattern.ExtendInstance(instance)]
+            for new_instance in new_instances:
+                insert_new_instance_list_scan(expected, new_instance)
+            actual = Pattern.ExtendInstances(instances)
+            # The first of matching instances is kept, with its edges in the order they were added, in order of creation
+            assert [[edge.id for edge in instance.edges] for instance in actual] == \
+                   [[edge.id for edge in instance.edges] for instance in expected]
+            num_duplicates += len(new_instances) - len(actual)
+            instances = actual
+    assert num_duplicates > 0
+
+
+if __name__ == "__main__":
+    test_extend_pattern_matches_pairwise_extension()
+    test_instance_graphs_built_once()
+    test_insert_new_instance_keeps_first_match()
+    test_extend_instances_matches_list_scan()
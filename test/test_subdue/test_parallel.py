@@ -0,0 +1,82 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Graph as Graph
+import subdue_python.Parallel as Parallel
+from graph_helpers import beam_search_graph_file, load, run_subdue, summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo17_p0,5')
+
+
+def test_published_graph_matches_graph():
+    graph = load(Graph.Graph, graph_file)
+    # Compress the graph, so that the edges of some vertices are not in the order of the edges of the graph
+    run_subdue(graph, 1, overlap="none", eval=1, iterations=2)
+    shared_memory, graph_state = Parallel.PublishGraph(CompactGraph.CreateCompactGraphFromGraph(graph))
+    attached_shared_memory, attached_graph = Parallel.AttachGraph(graph_state)
+    assert summary(attached_graph) == summary(graph)
+    del attached_graph
+    attached_shared_memory.close()
+    shared_memory.close()
+    shared_memory.unlink()
+
+
+def test_parallel_discovery_matches_sequential():
+    # Compress assumes instances do not overlap, so only the first setting runs a second iteration
+    for overlap, eval, iterations in [("none", 1, 2), ("vertex", 2, 1), ("edge", 3, 1)]:
+        settings = dict(overlap=overlap, eval=eval, iterations=iterations)
+        expected = run_subdue(load(Graph.Graph, graph_file), 1, **settings)
+        assert run_subdue(load(Graph.Graph, graph_file), 2, **settings) == expected
+        assert run_subdue(load(CompactGraph.CompactGraph, graph_file), 2, **settings) == expected
+
+
+def test_chunked_discovery_matches_sequential():
+    chunk_size = Parallel.gChunkSize
+    Parallel.gChunkSize = 5
+    try:
+        for overlap, eval in [("none", 1), ("vertex", 2), ("edge", 3)]:
+            settings = dict(overlap=overlap, eval=eval)
+            expected = run_subdue(load(Graph.Graph, graph_file), 1, **settings)
+            assert run_subdue(load(Graph.Graph, graph_file), 3, **settings) == expected
+    finally:
+        Parallel.gChunkSize = chunk_size
+
+
+def test_failures_free_shared_memory():
+    publish_graph, pool, extend = Parallel.PublishGraph, Parallel.multiprocessing.Pool, Parallel.ExpansionPool.extend
+    names = []
+
+    def recording_publish_graph(compact_graph):
+        published_memory, graph_state = publish_graph(compact_graph)
+        names.append(published_memory.name)
+        return published_memory, graph_state
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("failed")
+
+    Parallel.PublishGraph = recording_publish_graph
+    try:
+        # The pool fails to start, or the workers fail to extend the patterns
+        for patch in [lambda: setattr(Parallel.multiprocessing, 'Pool', failing),
+                      lambda: setattr(Parallel.ExpansionPool, 'extend', failing)]:
+            patch()
+            try:
+                with pytest.raises(RuntimeError):
+                    run_subdue(load(Graph.Graph, graph_file), 2)
+            finally:
+                Parallel.multiprocessing.Pool, Parallel.ExpansionPool.extend = pool, extend
+    finally:
+        Parallel.PublishGraph = publish_graph
+    assert len(names) == 2
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+
+if __name__ == "__main__":
+    test_published_graph_matches_graph()
+    test_parallel_discovery_matches_sequential()
+    test_chunked_discovery_matches_sequential()
+    test_failures_free_shared_memory()
@@ -0,0 +1,87 @@
+from random import Random
+
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+
+
+def pattern_list_insert_linear(new_pattern, pattern_list, max_length, value_based):
+    """PatternListInsert on a plain list, scanning the whole list for isomorphic patterns and for the position."""
+    for pattern in pattern_list:
+        if Graph.Match(pattern.definition, new_pattern.definition):
+            if pattern.value >= new_pattern.value:
+                return
+            pattern_list.remove(pattern)
+            break
+    insert_at_index = 0
+    for pattern in pattern_list:
+        if new_pattern.value > pattern.value:
+            break
+        insert_at_index += 1
+    pattern_list.insert(insert_at_index, new_pattern)
+    if value_based:
+        unique_values = Pattern.UniqueValues(pattern_list)
+        if len(unique_values) > max_length:
+            while pattern_list[-1].value == unique_values[-1]:
+                pattern_list.pop(-1)
+    elif len(pattern_list) > max_length:
+        pattern_list.pop(-1)
+
+
+def random_pattern(random):
+    """A pattern whose definition is a path of one to three edges with random labels, and a value with many ties."""
+    json_graph = []
+    num_edges = random.randint(1, 3)
+    for vertex_id in range(num_edges + 1):
+        json_graph.append({'vertex': {'id': str(vertex_id), 'attributes': {'label': random.choice('AB')}}})
+    for edge_id in range(num_edges):
+        json_graph.append({'edge': {'id': str(edge_id), 'source': str(edge_id), 'target': str(edge_id + 1),
+                                    'directed': 'true', 'attributes': {'label': random.choice('xy')}}})
+    pattern = Pattern.Pattern()
+    pattern.definition = Graph.Graph()
+    pattern.definition.load_from_json(json_graph)
+    pattern.value = random.randint(0, 20) / 4.0
+    return pattern
+
+
+def check_pattern_list_matches_linear_insert(create_pattern):
+    random = Random(0)
+    for max_length in [1, 3, 10, 100]:
+        for value_based in [False, True]:
+            pattern_list = Pattern.PatternList()
+            expected = []
+            for _ in range(300):
+                pattern = create_pattern(random)
+                Pattern.PatternListInsert(pattern, pattern_list, max_length, value_based)
+                pattern_list_insert_linear(pattern, expected, max_length, value_based)
+                assert [id(pattern) for pattern in pattern_list] == [id(pattern) for pattern in expected]
+            while pattern_list:
+                assert pattern_list.pop(0) is expected.pop(0)
+            assert not pattern_list.buckets and not pattern_list.valueCounts
+
+
+def test_pattern_list_matches_linear_insert():
+    check_pattern_list_matches_linear_insert(random_pattern)
+
+
+def test_pattern_list_matches_linear_insert_with_non_transitive_match():
+    # Like the bounded matcher, which may miss isomorphisms: a pattern can match two patterns that do not match
+    # each other, so the list is checked against patterns in the same order as the linear scan
+    def non_transitive_match(graph1, graph2):
+        return (abs(graph1.tag - graph2.tag) <= 1) and (Graph.CanonicalCode(graph1) == Graph.CanonicalCode(graph2))
+
+    def tagged_pattern(random):
+        pattern = random_pattern(random)
+        pattern.definition.tag = random.randint(0, 4)
+        return pattern
+
+    match = Graph.Match
+    Graph.Match = non_transitive_match
+    try:
+        check_pattern_list_matches_linear_insert(tagged_pattern)
+    finally:
+        Graph.Match = match
+
+
+if __name__ == "__main__":
+    test_pattern_list_matches_linear_insert()
+    test_pattern_list_matches_linear_insert_with_non_transitive_match()
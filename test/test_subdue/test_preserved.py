@@ -0,0 +1,20 @@
+import subdue_python.CompactGraph as CompactGraph
+import subdue_python.Graph as Graph
+from graph_helpers import beam_search_graph_file, load
+
+graph_file = beam_search_graph_file('SingleEO_10_eo97_p0,5')
+
+
+def count_preserved(elements):
+    return sum("Preserve" in element.attributes['label'] for element in elements)
+
+
+def test_preserved_counts():
+    for graph in [load(Graph.Graph, graph_file), load(CompactGraph.CompactGraph, graph_file)]:
+        counts = (count_preserved(graph.vertices.values()), count_preserved(graph.edges.values()))
+        assert counts[0] > 0
+        assert graph.preserved_counts() == counts
+
+
+if __name__ == "__main__":
+    test_preserved_counts()
@@ -0,0 +1,57 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+import subdue_python.Graph as Graph
+from subdue_python import Subdue
+from graph_helpers import beam_search_graph_file, summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo1_p0,5')
+
+
+def test_read_graph_matches_json_load():
+    with open(graph_file) as input_graph_file:
+        json_graph = json.load(input_graph_file)
+    read_chunk_size = Graph.gReadChunkSize
+    with tempfile.TemporaryDirectory() as input_dir:
+        gzip_file = os.path.join(input_dir, 'connected_components.json.gz')
+        with open(graph_file, 'rb') as input_graph_file, gzip.open(gzip_file, 'wb') as output_graph_file:
+            shutil.copyfileobj(input_graph_file, output_graph_file)
+        try:
+            # Small chunks split objects, strings and numbers between reads
+            for chunk_size in [7, 100, read_chunk_size]:
+                Graph.gReadChunkSize = chunk_size
+                for file_name in [graph_file, gzip_file]:
+                    assert list(Graph.ReadJsonGraph(file_name)) == json_graph
+                    for compact in [False, True]:
+                        expected = Graph.Graph()
+                        expected.load_from_json(json_graph)
+                        assert summary(Subdue.read_graph(file_name, compact)) == summary(expected)
+        finally:
+            Graph.gReadChunkSize = read_chunk_size
+
+
+def test_read_json_graph_syntax():
+    with tempfile.TemporaryDirectory() as input_dir:
+        file_name = os.path.join(input_dir, 'graph.json')
+        for text, expected in [('[]', []), (' [\n ] ', []), ('[{"vertex": {"id": "1"}}]', [{'vertex': {'id': '1'}}]),
+                               ('[ {"a": "]"} ,\n{"b": [1, 2]} ]\n', [{'a': ']'}, {'b': [1, 2]}]),
+                               # JSON Lines
+                               ('', []), ('{}', [{}]), ('{"a": 1}\n{"b": "}"}\n', [{'a': 1}, {'b': '}'}])]:
+            with open(file_name, 'w') as output_file:
+                output_file.write(text)
+            assert list(Graph.ReadJsonGraph(file_name)) == expected
+        for text in ['{"a": 1} x', '{"a": 1', '[{"a": 1}', '[{"a": 1} {"b": 2}]', '[{"a": 1},]', '[{"a": ']:
+            with open(file_name, 'w') as output_file:
+                output_file.write(text)
+            with pytest.raises(json.JSONDecodeError):
+                list(Graph.ReadJsonGraph(file_name))
+
+
+if __name__ == "__main__":
+    test_read_graph_matches_json_load()
+    test_read_json_graph_syntax()
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+
+import subdue_python.CompactGraph as CompactGraph
+from subdue_python import Subdue
+from graph_helpers import beam_search_graph_file, run_subdue, summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo1_p0,5')
+
+settings = dict(beamWidth=3, limit=10, maxSize=4, numBest=2, iterations=2)
+
+
+def test_snapshot_round_trip():
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_file = os.path.join(snapshot_dir, 'graph' + CompactGraph.gSnapshotExtension)
+        for compact in [False, True]:
+            graph = Subdue.read_graph(graph_file, compact)
+            # A compressed graph, with dead vertices and edges in a CompactGraph
+            run_subdue(graph, **settings)
+            CompactGraph.WriteSnapshot(graph, snapshot_file)
+            # Snapshots are always read into a CompactGraph, which can still be turned into a Graph
+            for compact_snapshot in [False, True]:
+                snapshot_graph = Subdue.read_graph(snapshot_file, compact_snapshot)
+                assert isinstance(snapshot_graph, CompactGraph.CompactGraph)
+                assert summary(snapshot_graph) == summary(graph)
+                snapshot_graph = CompactGraph.ReadSnapshot(snapshot_file, compact_snapshot)
+                assert isinstance(snapshot_graph, CompactGraph.CompactGraph) == compact_snapshot
+                assert summary(snapshot_graph) == summary(graph)
+                assert snapshot_graph.preserved_counts() == graph.preserved_counts()
+            del snapshot_graph
+
+
+def test_snapshot_discovery():
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_file = os.path.join(snapshot_dir, 'graph' + CompactGraph.gSnapshotExtension)
+        CompactGraph.WriteSnapshot(Subdue.read_graph(graph_file), snapshot_file)
+        expected = run_subdue(Subdue.read_graph(graph_file), **settings)
+        assert run_subdue(Subdue.read_graph(snapshot_file, True), **settings) == expected
+        assert run_subdue(Subdue.read_graph(snapshot_file), **settings) == expected
+
+
+def test_snapshot_keeps_attribute_types():
+    # Labels 1, 1.0 and True are equal, so they share a label id, but each element keeps its own attributes
+    labels = [True, 1, 1.0, 'A']
+    json_graph = [{'vertex': {'id': str(index + 1), 'timestamp': 0, 'attributes': {'label': label}}}
+                  for index, label in enumerate(labels)]
+    json_graph += [{'edge': {'id': str(index + 1), 'source': str(index + 1), 'target': str(index + 2), 'directed': 'true',
+                             'timestamp': 0, 'attributes': {'label': label}}} for index, label in enumerate(labels[:3])]
+    expected = [json.dumps({'label': label}) for label in labels + labels[:3]]
+
+    def attribute_texts(graph):
+        return [json.dumps(element.attributes) for element in list(graph.vertices.values()) + list(graph.edges.values())]
+
+    graph = CompactGraph.CompactGraph()
+    graph.load_from_json(json_graph)
+    assert attribute_texts(graph) == expected
+    assert len(set(vertex.labelId for vertex in graph.vertices.values())) == 2
+    assert attribute_texts(graph.to_graph()) == expected
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_file = os.path.join(snapshot_dir, 'graph' + CompactGraph.gSnapshotExtension)
+        CompactGraph.WriteSnapshot(graph, snapshot_file)
+        for compact_snapshot in [False, True]:
+            snapshot_graph = CompactGraph.ReadSnapshot(snapshot_file, compact_snapshot)
+            assert attribute_texts(snapshot_graph) == expected
+            assert summary(snapshot_graph) == summary(graph)
+            del snapshot_graph
+
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
+    test_snapshot_discovery()
+    test_snapshot_keeps_attribute_types()
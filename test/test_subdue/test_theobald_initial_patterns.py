@@ -0,0 +1,21 @@
+import theobald_subdue.T_Graph as Graph
+import theobald_subdue.T_Parameters as Parameters
+import theobald_subdue.T_Subdue as Subdue
+
+
+def test_unhashable_labels_are_kept_apart():
+    # Edge labels are lists, as networkx graphs may have
+    json_graph = [{'vertex': {'id': str(vertex_id), 'attributes': {'label': 'A'}}} for vertex_id in range(8)]
+    for edge_id, label in enumerate([[1], [2], [1], [2]]):
+        json_graph.append({'edge': {'id': str(edge_id), 'source': str(2 * edge_id), 'target': str(2 * edge_id + 1),
+                                    'directed': 'true', 'attributes': {'label': label}}})
+    graph = Graph.Graph()
+    graph.load_from_json(json_graph)
+    patterns = Subdue.get_initial_patterns(Parameters.Parameters(), graph)
+    assert [[edge.id for instance in pattern.instances for edge in instance.edges] for pattern in patterns] == \
+           [['0', '2'], ['1', '3']]
+    assert not Graph.GraphMatch(patterns[0].definition, patterns[1].definition)
+
+
+if __name__ == "__main__":
+    test_unhashable_labels_are_kept_apart()
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+
+import subdue_python.Graph as Graph
+from subdue_python import Subdue, Parameters
+from graph_helpers import beam_search_graph_file, summary
+
+graph_file = beam_search_graph_file('SingleEO_10_eo1_p0,5')
+
+
+def json_object(element):
+    if isinstance(element, Graph.Vertex):
+        return {'vertex': {'id': element.id, 'attributes': element.attributes, 'timestamp': str(element.timestamp)}}
+    return {'edge': {'id': element.id, 'source': element.source.id, 'target': element.target.id,
+                     'attributes': element.attributes, 'directed': 'true' if element.directed else 'false',
+                     'timestamp': str(element.timestamp)}}
+
+
+def quoted_graph():
+    """A graph whose ids and labels need escaping in JSON."""
+    json_graph = [{'vertex': {'id': '"1"', 'attributes': {'label': 'a "quoted" \\ label'}, 'timestamp': '3'}},
+                  {'vertex': {'id': '2', 'attributes': {'label': 'line\nbreak', 'name': 'é'}}},
+                  {'edge': {'id': 'e"1', 'source': '"1"', 'target': '2', 'directed': 'true',
+                            'attributes': {'label': '{"x": 1}'}, 'timestamp': '4'}},
+                  {'edge': {'id': 'e2', 'source': '2', 'target': '2', 'directed': 'false', 'attributes': {}}}]
+    graph = Graph.Graph()
+    graph.load_from_json(json_graph)
+    return graph
+
+
+def test_write_graph_round_trip():
+    write_chunk_size = Graph.gWriteChunkSize
+    with tempfile.TemporaryDirectory() as output_dir:
+        try:
+            for chunk_size in [1, 3, write_chunk_size]:
+                Graph.gWriteChunkSize = chunk_size
+                for graph in [quoted_graph(), Subdue.read_graph(graph_file), Subdue.read_graph(graph_file, True),
+                              Graph.Graph()]:
+                    for file_name, json_lines in [('graph.json', False), ('graph.json.gz', False),
+                                                  ('graph.jsonl', True), ('graph.jsonl.gz', True)]:
+                        output_file = os.path.join(output_dir, file_name)
+                        graph.write_to_file(output_file, json_lines)
+                        if not (json_lines or file_name.endswith('.gz')):
+                            with open(output_file) as input_file:
+                                json.load(input_file)
+                        for compact in [False, True]:
+                            assert summary(Subdue.read_graph(output_file, compact)) == summary(graph)
+        finally:
+            Graph.gWriteChunkSize = write_chunk_size
+
+
+def mixed_type_graph():
+    """A graph whose attribute values are equal but of different types, or whose attributes are in different orders."""
+    json_graph = [{'vertex': {'id': '1', 'attributes': {'label': True}}},
+                  {'vertex': {'id': '2', 'attributes': {'label': 1}}},
+                  {'vertex': {'id': '3', 'attributes': {'label': 1.0}}},
+                  {'vertex': {'id': '4', 'attributes': {'label': 'A', 'x': 0}}},
+                  {'vertex': {'id': '5', 'attributes': {'x': False, 'label': 'A'}}},
+                  {'edge': {'id': '1', 'source': '1', 'target': '2', 'directed': 'true', 'attributes': {'label': 1}}},
+                  {'edge': {'id': '2', 'source': '2', 'target': '3', 'directed': 'true', 'attributes': {'label': True}}}]
+    graph = Graph.Graph()
+    graph.load_from_json(json_graph)
+    return graph
+
+
+def test_write_graph_keeps_attribute_types():
+    graph = mixed_type_graph()
+    # Equal attributes still match
+    assert graph.vertices['1'].labelId == graph.vertices['2'].labelId == graph.vertices['3'].labelId
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_file = os.path.join(output_dir, 'graph.json')
+        graph.write_to_file(output_file)
+        assert [json.dumps(json_object['vertex' if 'vertex' in json_object else 'edge']['attributes'])
+                for json_object in Graph.ReadJsonGraph(output_file)] == \
+               [json.dumps(element.attributes) for element in list(graph.vertices.values()) + list(graph.edges.values())]
+
+
+def test_write_instances():
+    graph = Subdue.read_graph(graph_file)
+    parameters = Parameters.Parameters()
+    pattern = max(Subdue.get_initial_patterns(parameters, graph), key=lambda pattern: len(pattern.instances))
+    with tempfile.TemporaryDirectory() as output_dir:
+        expected = [json_object(element) for instance in pattern.instances for element in instance.elements()]
+        for file_name, json_lines in [('instances.json', False), ('instances.jsonl.gz', True)]:
+            output_file = os.path.join(output_dir, file_name)
+            pattern.write_instances_to_file(output_file, output_dir, json_lines)
+            assert list(Graph.ReadJsonGraph(output_file)) == expected
+            with open(os.path.join(output_dir, 'subdue_python_count_instances.txt')) as count_file:
+                assert count_file.read().split('\n')[1] == str(len(pattern.instances))
+        output_file = os.path.join(output_dir, 'pattern.json')
+        first_instance = [json_object(element) for element in pattern.instances[0].elements()]
+        pattern.write_pattern_to_file(output_file)
+        assert list(Graph.ReadJsonGraph(output_file)) == first_instance
+        with open(output_file, 'w') as instance_file:
+            instance_file.write('[\n')
+            pattern.instances[0].write_to_file(instance_file)
+            instance_file.write('\n]\n')
+        assert list(Graph.ReadJsonGraph(output_file)) == first_instance
+
+
+if __name__ == "__main__":
+    test_write_graph_round_trip()
+    test_write_graph_keeps_attribute_types()
+    test_write_instances()
@@ -0,0 +1,45 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from subdue_python import Subdue, Parameters
+
+# Runs the beam search on each SingleEO data set with each overlap setting, and reports the run time and the peak
+# memory allocated during the run (measured in a second run, as tracing slows the search down). Further parameters
+# can be given as name=value arguments, e.g. beamWidth=10 limit=40.
+data_sets = [data_set for data_set in sorted(os.listdir('.')) if data_set.startswith('SingleEO')]
+
+overlaps = ["none", "vertex", "edge"]
+
+settings = dict(beamWidth=4, limit=20, maxSize=6, minSize=1, numBest=3)
+for arg in sys.argv[1:]:
+    name, value = arg.split('=')
+    settings[name] = value if name in ["matcher", "isomorphism"] else int(value)
+
+
+def run_subdue(data_set, overlap):
+    graph = Subdue.read_graph(data_set + '/connected_components.json')
+    parameters = Parameters.Parameters()
+    parameters.set_parameters_from_kwargs(overlap=overlap, **settings)
+    parameters.set_defaults_for_graph(graph)
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        parameters.outputFileName = os.path.join(output_dir, 'graph')
+        return Subdue.subdue(parameters, graph)
+
+
+print("%-24s %-8s %10s %12s %s" % ("data set", "overlap", "time", "peak memory", "best value"))
+for data_set in data_sets:
+    for overlap in overlaps:
+        start = time.time()
+        iterations = run_subdue(data_set, overlap)
+        duration = time.time() - start
+        tracemalloc.start()
+        run_subdue(data_set, overlap)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        best_value = iterations[0][0].value if iterations and iterations[0] else None
+        print("%-24s %-8s %9.2fs %9.1f MiB %s" % (data_set, overlap, duration, peak / 2 ** 20, best_value))
@@ -0,0 +1,62 @@
+import os
+import time
+
+import subdue_python.Graph as Graph
+import subdue_python.Pattern as Pattern
+from subdue_python import Subdue, Parameters
+
+# Compares GraphMatch, GraphMatch_Orig and GraphMatch_VF2 on the instance graphs that beam search builds for the
+# SingleEO data sets: the initial patterns are extended twice, and every matcher is run on the same pairs of
+# extended instance graphs, both within canonical code buckets (the pairs ExtendPattern checks) and across them.
+data_sets = [data_set for data_set in sorted(os.listdir('.')) if data_set.startswith('SingleEO')]
+
+matchers = [("GraphMatch", Graph.GraphMatch), ("GraphMatch_Orig", Graph.GraphMatch_Orig),
+            ("GraphMatch_VF2", Graph.GraphMatch_VF2)]
+
+max_pairs = 20000
+
+
+def instance_graphs(data_set):
+    graph = Subdue.read_graph(data_set + '/connected_components.json')
+    parameters = Parameters.Parameters()
+    parameters.overlap = 'vertex'
+    parameters.set_defaults_for_graph(graph)
+    patterns = Subdue.get_initial_patterns(parameters, graph)
+    for _ in range(2):
+        patterns = sorted(patterns, key=lambda pattern: -len(pattern.instances))[:parameters.beamWidth]
+        patterns = [child for pattern in patterns for child in Pattern.ExtendPattern(parameters, pattern)]
+    return [Graph.CreateGraphFromInstance(instance) for pattern in patterns for instance in pattern.instances]
+
+
+def pairs_of(graphs):
+    buckets = {}
+    for graph in graphs:
+        buckets.setdefault(Graph.CanonicalCode(graph), []).append(graph)
+    same_bucket = [(bucket[0], other) for bucket in buckets.values() for other in bucket[1:]][:max_pairs]
+    across = [(graph1, graph2) for graph1, graph2 in zip(graphs, graphs[1:] + graphs[:1])][:max_pairs]
+    return same_bucket, across
+
+
+def run_matchers(name, pairs):
+    verdicts = {}
+    for matcher_name, matcher in matchers:
+        Graph.ResetMatchStatistics()
+        start = time.time()
+        verdicts[matcher_name] = [matcher(graph1, graph2) for graph1, graph2 in pairs]
+        duration = time.time() - start
+        print("  %-10s %-16s %6d pairs, %6d matches, %8.4fs   %s" % (name, matcher_name, len(pairs),
+              sum(verdicts[matcher_name]), duration, Graph.MatchStatisticsString()))
+    for matcher_name, _ in matchers[:-1]:
+        disagreements = sum(verdict != exact for verdict, exact in zip(verdicts[matcher_name], verdicts["GraphMatch_VF2"]))
+        print("  %-10s %-16s disagrees with GraphMatch_VF2 on %d pairs" % (name, matcher_name, disagreements))
+
+
+for data_set in data_sets:
+    print(data_set)
+    graphs = instance_graphs(data_set)
+    same_bucket, across = pairs_of(graphs)
+    # Build the cached invariants up front, so every matcher is timed on the search alone
+    for graph in graphs:
+        Graph.GetInvariants(graph)
+    run_matchers("bucket", same_bucket)
+    run_matchers("across", across)